@@ -0,0 +1,25 @@
+"""
+Archiviazione dei contenuti degli articoli vecchi in un DB separato (crypto_news_archivio.db).
+
+Il DB principale resta piccolo e contiene solo il "working set" della pipeline (gli ultimi giorni);
+i contenuti spostati vengono letti dall'archivio in modo trasparente da database.py e dai report.
+
+Uso (dalla root del progetto):
+    python archiviazioneArticoli.py --giorni 30
+    python archiviazioneArticoli.py --giorni 90 --riassunti --vacuum
+"""
+
+import argparse
+
+import database
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sposta nell'archivio i contenuti degli articoli vecchi")
+    parser.add_argument("--giorni", type=int, default=30, help="archivia gli articoli più vecchi di N giorni")
+    parser.add_argument("--riassunti", action="store_true", help="sposta anche riassunto breve e lungo")
+    parser.add_argument("--vacuum", action="store_true", help="compatta il DB principale al termine")
+    args = parser.parse_args()
+
+    database.migra_database()
+    database.archivia_articoli(args.giorni, includi_riassunti=args.riassunti, vacuum=args.vacuum)
@@ -0,0 +1,136 @@
+"""
+Archivio su disco dell'HTML grezzo degli articoli e rielaborazione offline.
+
+Ogni pagina scaricata (via HTTP o da Chrome) viene salvata compressa con gzip in un file
+indirizzato per contenuto (sha256 dell'HTML): pagine identiche occupano un solo file.
+La tabella html_grezzi del DB collega id articolo e url all'hash del file.
+
+Con il replay si rilancia cleanHtml.clean_html_content su tutto l'archivio, senza rete né
+browser: cambiare le soglie della pulizia non richiede più di riscaricare i siti.
+
+Struttura:
+    archivio_html/ab/abcdef....html.gz
+
+Uso (dalla root del progetto):
+    python archivioHtml.py replay [--soglia 0.35] [--soglia-h2 0.35] [--url URL] [--salva] [--backend onnx] [--workers N]
+
+Senza --salva il replay riporta solo quanti contenuti cambierebbero; con --salva sostituisce
+i contenuti cambiati e azzera riassunti, categoria, peso e sentiment di quegli articoli,
+che la pipeline ricalcola al prossimo avvio.
+"""
+
+import argparse
+import gzip
+import hashlib
+import os
+import tempfile
+from collections import Counter, deque
+from pathlib import Path
+
+import database
+
+ARCHIVIO_HTML_DIR = Path("archivio_html")
+LIVELLO_GZIP = 6
+
+
+def percorso_html(hash_html, archivio_dir=ARCHIVIO_HTML_DIR):
+    return Path(archivio_dir) / hash_html[:2] / f"{hash_html}.html.gz"
+
+
+def salva_html_grezzo(html, archivio_dir=ARCHIVIO_HTML_DIR):
+    """Salva l'HTML (se non è già presente) e ne ritorna l'hash. None se non c'è HTML."""
+    if not html:
+        return None
+    dati = html.encode("utf-8")
+    hash_html = hashlib.sha256(dati).hexdigest()
+
+    percorso = percorso_html(hash_html, archivio_dir)
+    if not percorso.exists():
+        percorso.parent.mkdir(parents=True, exist_ok=True)
+        # File temporaneo univoco: più thread possono salvare insieme la stessa pagina (es. un muro dei cookie)
+        with tempfile.NamedTemporaryFile(dir=percorso.parent, prefix=f".{percorso.name}.", suffix=".tmp",
+                                         delete=False) as tmp:
+            tmp.write(gzip.compress(dati, LIVELLO_GZIP))
+        try:
+            os.replace(tmp.name, percorso)
+        except OSError:
+            os.unlink(tmp.name)
+            if not percorso.exists():
+                raise  # altrimenti l'ha appena salvata un altro thread
+    return hash_html
+
+
+def leggi_html_grezzo(hash_html, archivio_dir=ARCHIVIO_HTML_DIR):
+    return gzip.decompress(percorso_html(hash_html, archivio_dir).read_bytes()).decode("utf-8")
+
+
+def replay(similarity_threshold=0.35, h2_similarity_threshold=0.35, url=None, salva=False,
+           dimensione_flush=database.DIMENSIONE_FLUSH, archivio_dir=ARCHIVIO_HTML_DIR, backend=None, workers=None):
+    """
+    Ripulisce l'HTML archiviato con le soglie indicate e confronta il risultato con il
+    contenuto attuale degli articoli. `backend` sceglie il backend di SBERT ("torch"/"onnx",
+    None = quello già impostato in cleanHtml); le pagine vengono pulite in parallelo su
+    `workers` processi (cleanHtml.clean_html_batch). Ritorna il conteggio degli esiti.
+    """
+    import cleanHtml  # carica i modelli solo quando serve davvero
+    if backend:
+        cleanHtml.imposta_backend(backend)
+
+    esiti = Counter()
+    in_lavorazione = deque()  # (id, contenuto attuale) delle pagine inviate, nello stesso ordine dei risultati
+
+    def pagine_archiviate():
+        for id_articolo, hash_html, contenuto_attuale in database.itera_html_grezzi(url=url):
+            try:
+                html = leggi_html_grezzo(hash_html, archivio_dir)
+            except FileNotFoundError:
+                esiti["file mancante"] += 1
+                continue
+            in_lavorazione.append((id_articolo, contenuto_attuale))
+            yield html
+
+    pulite = cleanHtml.clean_html_batch(pagine_archiviate(), workers or cleanHtml.NUM_PROCESSI_PULIZIA,
+                                        similarity_threshold, h2_similarity_threshold)
+    with database.BufferScrittura(database.sostituisci_contenuti_bulk, dimensione_flush) as buffer:
+        for nuovo in pulite:
+            id_articolo, contenuto_attuale = in_lavorazione.popleft()
+            nuovo = nuovo if nuovo.strip() else "NESSUN CONTENUTO"
+
+            if nuovo == contenuto_attuale:
+                esiti["invariati"] += 1
+                continue
+            if nuovo == "NESSUN CONTENUTO":
+                esiti["contenuto -> vuoto"] += 1
+            elif contenuto_attuale in (None, "NESSUN CONTENUTO"):
+                esiti["vuoto -> contenuto"] += 1
+            else:
+                esiti["contenuto modificato"] += 1
+
+            if salva:
+                buffer.aggiungi(id_articolo, nuovo)
+
+    cleanHtml.cache_embedding.stampa_statistiche()
+    totale = sum(esiti.values())
+    print(f"🔁 Replay su {totale} pagine archiviate (soglie {similarity_threshold} / {h2_similarity_threshold}):")
+    for esito, n in esiti.most_common():
+        print(f"   {esito:<22}{n:>8}")
+    if not salva and totale - esiti["invariati"] - esiti["file mancante"]:
+        print("ℹ️ Nessuna modifica salvata: rilanciare con --salva per applicarle.")
+    return esiti
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archivio HTML grezzo degli articoli")
+    comandi = parser.add_subparsers(dest="comando", required=True)
+
+    p_replay = comandi.add_parser("replay", help="ripulisce l'HTML archiviato senza rete né browser")
+    p_replay.add_argument("--soglia", type=float, default=0.35, help="similarity_threshold di clean_html_content")
+    p_replay.add_argument("--soglia-h2", type=float, default=0.35, help="h2_similarity_threshold di clean_html_content")
+    p_replay.add_argument("--url", help="solo gli articoli di questa pagina")
+    p_replay.add_argument("--salva", action="store_true", help="sostituisce i contenuti cambiati nel DB")
+    p_replay.add_argument("--backend", choices=("torch", "onnx"), help="backend di SBERT (vedi esportazioneOnnx.py)")
+    p_replay.add_argument("--workers", type=int, help="processi di pulizia in parallelo (default: metà dei core)")
+
+    args = parser.parse_args()
+    database.migra_database()
+    replay(args.soglia, args.soglia_h2, args.url, args.salva, backend=args.backend, workers=args.workers)
@@ -0,0 +1,89 @@
+"""
+Confronto tra il profilo Chrome normale e la modalità leggera (fetchArticoli.BROWSER_LEGGERO):
+per ogni pagina misura byte scaricati e tempo fino a pagina pronta con entrambi i profili.
+
+Uso (dalla root del progetto):
+    python benchmarkBrowser.py [--campioni 10] [--url https://... ...]
+
+Senza --url usa gli ultimi url originali salvati nel DB. La cache del browser è disattivata,
+così entrambi i profili scaricano tutto da zero.
+"""
+
+import argparse
+import json
+import time
+
+import database
+import fetchArticoli
+
+PROFILO_BENCHMARK = "selenium-benchmark"  # profilo separato: non tocca quello usato dalla pipeline
+
+
+def _byte_scaricati(driver):
+    """Byte ricevuti dalla rete (Network.loadingFinished) dall'ultima lettura del log."""
+    totale = 0
+    for voce in driver.get_log("performance"):
+        messaggio = json.loads(voce["message"])["message"]
+        if messaggio["method"] == "Network.loadingFinished":
+            totale += messaggio["params"].get("encodedDataLength", 0)
+    return totale
+
+
+def misura_profilo(urls, leggero):
+    """Ritorna {url: (byte, secondi)} caricando le pagine con il profilo indicato."""
+    driver = fetchArticoli.setup_chrome_driver(PROFILO_BENCHMARK, leggero=leggero, log_rete=True)
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": True})
+
+    risultati = {}
+    try:
+        for url in urls:
+            driver.get("about:blank")
+            _byte_scaricati(driver)  # svuota il log
+
+            inizio = time.perf_counter()
+            try:
+                driver.get(url)
+                fetchArticoli.attendi_pagina_caricata(driver, "benchmark: pagina caricata", 30)
+            except Exception as e:
+                print(f"❌ Errore caricando {url}: {e}")
+                continue
+            secondi = time.perf_counter() - inizio
+            risultati[url] = (_byte_scaricati(driver), secondi)
+    finally:
+        driver.quit()
+    return risultati
+
+
+def confronta(urls):
+    normale = misura_profilo(urls, leggero=False)
+    leggero = misura_profilo(urls, leggero=True)
+
+    print(f"\n{'pagina':<50}{'KB normale':>12}{'KB leggero':>12}{'s normale':>11}{'s leggero':>11}")
+    tot = [0, 0, 0.0, 0.0]
+    for url in urls:
+        if url not in normale or url not in leggero:
+            continue
+        (b_n, s_n), (b_l, s_l) = normale[url], leggero[url]
+        tot = [tot[0] + b_n, tot[1] + b_l, tot[2] + s_n, tot[3] + s_l]
+        print(f"{url[:48]:<50}{b_n / 1024:>12.0f}{b_l / 1024:>12.0f}{s_n:>11.2f}{s_l:>11.2f}")
+
+    pagine = len(set(normale) & set(leggero))
+    if not pagine:
+        print("⚠️ Nessuna pagina caricata con entrambi i profili.")
+        return
+    print(f"\n📊 {pagine} pagine: risparmiati in media {(tot[0] - tot[1]) / pagine / 1024:.0f} KB "
+          f"({100 * (1 - tot[1] / max(tot[0], 1)):.0f}%) e {(tot[2] - tot[3]) / pagine:.2f} s per pagina.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Confronto profilo Chrome normale / leggero")
+    parser.add_argument("--campioni", type=int, default=10, help="numero di url presi dal DB")
+    parser.add_argument("--url", nargs="+", help="url da misurare al posto di quelli del DB")
+    args = parser.parse_args()
+
+    urls = args.url or database.get_url_articoli_recenti(args.campioni)
+    if not urls:
+        print("✅ Nessun url originale nel DB: niente da misurare.")
+    else:
+        confronta(urls)
@@ -0,0 +1,84 @@
+"""
+Tempo di import dei punti di ingresso della pipeline, misurato con `python -X importtime`
+in un interprete nuovo per ogni punto di ingresso (nessun modulo già in cache).
+
+Per ognuno stampa il tempo totale e i moduli più lenti (tempo cumulativo, sottomoduli
+inclusi), così si vede subito se un import carica di nuovo un modello o una libreria pesante.
+
+Uso (dalla root del progetto):
+    python benchmarkImport.py [--primi 10] [--modulo nome.modulo ...]
+"""
+
+import argparse
+import subprocess
+import sys
+
+# Punto di ingresso -> moduli da importare
+PUNTI_DI_INGRESSO = {
+    "main.py": ["main"],
+    "archivioHtml.py": ["archivioHtml"],
+    "esportazioneParquet.py": ["esportazioneParquet"],
+    "ricercaArticoli.py": ["ricercaArticoli"],
+    "archiviazioneArticoli.py": ["archiviazioneArticoli"],
+    "compressioneArticoli.py": ["compressioneArticoli"],
+    "benchmarkBrowser.py": ["benchmarkBrowser"],
+    "report/generazioneReport2.py": ["report.generazioneReport2"],
+}
+
+
+def misura_import(moduli):
+    """
+    Importa i moduli in un nuovo interprete con -X importtime.
+    Ritorna (secondi totali, [(secondi cumulativi, modulo)] dei moduli importati direttamente e
+    indirettamente), oppure None e il messaggio d'errore se l'import fallisce.
+    """
+    codice = "; ".join(f"import {modulo}" for modulo in moduli)
+    processo = subprocess.run([sys.executable, "-X", "importtime", "-c", codice], capture_output=True, text=True)
+
+    tempi = []
+    errore = []
+    for riga in processo.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not riga.startswith("import time:"):
+            errore.append(riga)
+            continue
+        campi = riga[len("import time:"):].split("|")
+        if not campi[0].strip().isdigit():
+            continue  # intestazione
+        nome = campi[2].rstrip()
+        livello = (len(nome) - len(nome.lstrip())) // 2  # rientro: 0 = importato direttamente
+        tempi.append((int(campi[1]) / 1e6, nome.strip(), livello))
+
+    if processo.returncode != 0:
+        return None, (errore[-1] if errore else f"codice di uscita {processo.returncode}")
+
+    totale = sum(secondi for secondi, _, livello in tempi if livello == 0)
+    return totale, sorted(((secondi, nome) for secondi, nome, _ in tempi), reverse=True)
+
+
+def confronta(punti_di_ingresso, primi):
+    riepilogo = []
+    for nome, moduli in punti_di_ingresso.items():
+        totale, dettaglio = misura_import(moduli)
+        if totale is None:
+            print(f"\n❌ {nome}: import non riuscito ({dettaglio})")
+            continue
+
+        riepilogo.append((nome, totale))
+        print(f"\n⏱️ {nome}: {totale:.2f} s")
+        for secondi, modulo in dettaglio[:primi]:
+            print(f"   {modulo[:50]:<52}{secondi:>8.3f} s")
+
+    if riepilogo:
+        print(f"\n{'punto di ingresso':<34}{'import s':>10}")
+        for nome, totale in riepilogo:
+            print(f"{nome:<34}{totale:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tempo di import dei punti di ingresso della pipeline")
+    parser.add_argument("--primi", type=int, default=10, help="moduli più lenti da mostrare per ogni punto di ingresso")
+    parser.add_argument("--modulo", nargs="+", help="moduli da misurare al posto dei punti di ingresso")
+    args = parser.parse_args()
+
+    confronta({m: [m] for m in args.modulo} if args.modulo else PUNTI_DI_INGRESSO, args.primi)
@@ -1,9 +1,7 @@
 import pickle
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
 import database
 
-def classificaNewArticle():
+def classificaNewArticle(dimensione_flush=1000):
     # Estrai ID e riassunto lungo da articoli senza categoria (via modulo database)
     dati = database.get_articoli_senza_categoria()
 
@@ -12,6 +10,9 @@ def classificaNewArticle():
         print("✅ Nessun articolo da classificare.")
         return
 
+    # pandas (e sklearn, all'unpickle del modello) si importano solo se c'è qualcosa da classificare
+    import pandas as pd
+
     # Crea DataFrame
     df = pd.DataFrame(dati, columns=['id', 'riassunto_lungo'])
 
@@ -28,14 +29,10 @@ def classificaNewArticle():
     # Predizione
     df['categoria'] = model.predict(X_tfidf)
 
-    # Aggiorna il database
-    # — Opzione A: come il tuo codice originale, per riga —
-    for _, row in df.iterrows():
-        database.aggiorna_categoria_articolo(row['id'], row['categoria'])
-
-    # — Opzione B (più efficiente): in batch —
-    # updates = list(zip(df['categoria'].tolist(), df['id'].tolist()))
-    # database.aggiorna_categorie_articoli(updates)
+    # Aggiorna il database in batch: un solo executemany per blocco di `dimensione_flush` righe
+    updates = list(zip(df['categoria'].tolist(), df['id'].tolist()))
+    for inizio in range(0, len(updates), dimensione_flush):
+        database.aggiorna_categorie_articoli(updates[inizio:inizio + dimensione_flush])
 
     print("✅ Categorizzazione completata e salvata nel database.")
 
@@ -1,20 +1,239 @@
-import spacy
-from sklearn.metrics.pairwise import cosine_similarity
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
 from bs4 import BeautifulSoup
-from sentence_transformers import SentenceTransformer
 from langdetect import detect
 
+MODELLO_SBERT = 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2'
+BATCH_SIZE_SBERT = 64  # testi per passata del modello nella codifica a batch
 
-# Carichiamo il modello NLP per l'italiano
-nlp = spacy.load("it_core_news_md")
+# Backend del modello SBERT: "torch" (sentence-transformers) oppure "onnx" (ONNX Runtime, pesi int8
+# creati con `python esportazioneOnnx.py esporta`). Si cambia con imposta_backend().
+BACKEND_SBERT = "torch"
+MODELLO_ONNX_DIR = Path("modelli") / "sbert-onnx-int8"
 
-# Carichiamo il modello SBERT
-model = SentenceTransformer('sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2')
+# Il modello SBERT (e con lui torch) viene caricato alla prima pulizia, non all'import del modulo:
+# chi importa fetchArticoli solo per il feed o per un report non paga qualche secondo di avvio
+_model = None
+_lock_model = threading.Lock()
+
+# Embedding dei paragrafi già codificati (cookie, newsletter, "Leggi anche", firme degli autori si
+# ripetono su tutte le pagine di un sito). ~1,5 KB per voce con MiniLM (384 float32).
+DIMENSIONE_CACHE_EMBEDDING = 20_000
+CACHE_EMBEDDING_PATH = Path("modelli") / "cache_embedding.npz"
+
+# Processi di default per la pulizia in parallelo (clean_html_batch): ognuno carica il proprio SBERT
+NUM_PROCESSI_PULIZIA = max(1, (os.cpu_count() or 2) // 2)
+
+
+class SbertOnnx:
+    """
+    Stesso modello SBERT eseguito con ONNX Runtime: encoder esportato e quantizzato int8 più il
+    mean pooling di sentence-transformers. encode() ha la stessa interfaccia di SentenceTransformer
+    per gli argomenti usati in questo modulo.
+    """
+
+    def __init__(self, cartella=MODELLO_ONNX_DIR):
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        cartella = Path(cartella)
+        config = json.loads((cartella / "sbert_onnx.json").read_text(encoding="utf-8"))
+        self.max_seq_length = config["max_seq_length"]
+        self.tokenizer = AutoTokenizer.from_pretrained(cartella)
+        self.sessione = onnxruntime.InferenceSession(str(cartella / config["file"]), providers=["CPUExecutionProvider"])
+        self.ingressi = {i.name for i in self.sessione.get_inputs()}
+
+    def encode(self, testi, batch_size=32, normalize_embeddings=False, convert_to_numpy=True):
+        import numpy as np
+
+        singolo = isinstance(testi, str)
+        if singolo:
+            testi = [testi]
+
+        # Testi ordinati per lunghezza, come fa sentence-transformers: meno padding in ogni batch
+        ordine = sorted(range(len(testi)), key=lambda i: -len(testi[i]))
+        risultati = [None] * len(testi)
+        for inizio in range(0, len(ordine), batch_size):
+            blocco = ordine[inizio:inizio + batch_size]
+            token = self.tokenizer([testi[i] for i in blocco], padding=True, truncation=True,
+                                   max_length=self.max_seq_length, return_tensors="np")
+            last_hidden = self.sessione.run(None, {n: token[n].astype(np.int64) for n in self.ingressi})[0]
+
+            # Mean pooling sui token validi
+            mask = token["attention_mask"][..., None].astype(np.float32)
+            vettori = (last_hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if normalize_embeddings:
+                vettori /= np.clip(np.linalg.norm(vettori, axis=1, keepdims=True), 1e-12, None)
+            for i, vettore in zip(blocco, vettori):
+                risultati[i] = vettore
+
+        embeddings = np.stack(risultati) if risultati else np.zeros((0, 0), dtype=np.float32)
+        return embeddings[0] if singolo else embeddings
+
+
+class CacheEmbedding:
+    """
+    Cache LRU degli embedding normalizzati, condivisa da tutte le pulizie del processo. La chiave è
+    l'hash del testo con gli spazi normalizzati; per ogni dominio conta hit (testi non ricodificati)
+    e miss. Si può salvare su disco e ricaricare tra un'esecuzione e l'altra (salva()/carica()).
+    """
+
+    def __init__(self, capacita=DIMENSIONE_CACHE_EMBEDDING):
+        self.capacita = capacita
+        self._vettori = OrderedDict()  # chiave -> embedding, dal meno al più recente
+        self._lock = threading.Lock()
+        self.hit = Counter()   # dominio -> testi trovati in cache
+        self.miss = Counter()  # dominio -> testi da codificare
+        self.percorso = None   # file da cui è stata caricata: lo ricaricano anche i processi di pulizia
+        self.nuovi = None      # se è una lista, aggiungi() vi registra le voci nuove (processi di pulizia)
+
+    @staticmethod
+    def chiave(testo):
+        return hashlib.blake2b(" ".join(testo.split()).encode("utf-8"), digest_size=16).hexdigest()
+
+    def cerca(self, chiavi, dominio=None):
+        """Embedding di ogni chiave, o None per quelle da codificare."""
+        dominio = dominio or "-"
+        vettori = []
+        with self._lock:
+            for chiave in chiavi:
+                vettore = self._vettori.get(chiave)
+                if vettore is not None:
+                    self._vettori.move_to_end(chiave)
+                vettori.append(vettore)
+            trovati = sum(v is not None for v in vettori)
+            self.hit[dominio] += trovati
+            self.miss[dominio] += len(vettori) - trovati
+        return vettori
+
+    def aggiungi(self, chiavi, vettori):
+        with self._lock:
+            for chiave, vettore in zip(chiavi, vettori):
+                self._vettori[chiave] = vettore
+                self._vettori.move_to_end(chiave)
+                if self.nuovi is not None:
+                    self.nuovi.append((chiave, vettore))
+            while len(self._vettori) > self.capacita:
+                self._vettori.popitem(last=False)
+
+    def estrai_novita(self):
+        """Ritorna e azzera hit, miss e voci aggiunte dall'ultima chiamata (lato processo di pulizia)."""
+        with self._lock:
+            hit, miss, nuovi = self.hit.copy(), self.miss.copy(), self.nuovi or []
+            self.hit.clear()
+            self.miss.clear()
+            if self.nuovi is not None:
+                self.nuovi = []
+        return hit, miss, nuovi
+
+    def unisci(self, hit, miss, nuovi):
+        """Aggiunge statistiche e voci nuove di un processo di pulizia a questa cache."""
+        with self._lock:
+            self.hit.update(hit)
+            self.miss.update(miss)
+        self.aggiungi([chiave for chiave, _ in nuovi], [vettore for _, vettore in nuovi])
+
+    def __len__(self):
+        return len(self._vettori)
+
+    def svuota(self):
+        with self._lock:
+            self._vettori.clear()
+
+    def salva(self, percorso=CACHE_EMBEDDING_PATH):
+        import numpy as np
+
+        with self._lock:
+            chiavi, vettori = list(self._vettori), list(self._vettori.values())
+        if not chiavi:
+            return
+        percorso = Path(percorso)
+        percorso.parent.mkdir(parents=True, exist_ok=True)
+        tmp = percorso.with_name(f"_{percorso.stem}.tmp.npz")  # np.savez aggiunge .npz se manca
+        np.savez(tmp, chiavi=np.array(chiavi), vettori=np.stack(vettori), modello=np.array(_firma_modello()))
+        os.replace(tmp, percorso)
+        print(f"💾 Cache degli embedding salvata: {len(chiavi)} paragrafi ({percorso}).")
+
+    def carica(self, percorso=CACHE_EMBEDDING_PATH, stampa=True):
+        """Ricarica la cache salvata, se è stata creata con lo stesso modello e backend."""
+        import numpy as np
+
+        percorso = Path(percorso)
+        if not percorso.exists():
+            return 0
+        with np.load(percorso, allow_pickle=False) as dati:
+            if str(dati["modello"]) != _firma_modello():
+                print(f"⚠️ Cache degli embedding creata con un altro modello o backend: ignorata ({percorso}).")
+                return 0
+            self.aggiungi(dati["chiavi"].tolist(), list(dati["vettori"]))
+        self.percorso = percorso
+        if stampa:
+            print(f"💾 Cache degli embedding caricata: {len(self)} paragrafi.")
+        return len(self)
+
+    def stampa_statistiche(self, max_domini=15, azzera=True):
+        with self._lock:
+            righe = [(dominio, self.hit[dominio], self.miss[dominio]) for dominio in set(self.hit) | set(self.miss)]
+            if azzera:
+                self.hit.clear()
+                self.miss.clear()
+        totale_hit, totale = sum(r[1] for r in righe), sum(r[1] + r[2] for r in righe)
+        if not totale:
+            return
+
+        righe.sort(key=lambda r: r[1], reverse=True)
+        print(f"\n🧠 Cache degli embedding: {totale_hit}/{totale} testi non ricodificati "
+              f"({totale_hit / totale:.0%}), {len(self)} paragrafi in memoria. Primi {min(max_domini, len(righe))} domini:")
+        print(f"{'dominio':<32}{'testi':>8}{'hit':>8}{'hit %':>8}")
+        for dominio, hit, miss in righe[:max_domini]:
+            print(f"{dominio[:30]:<32}{hit + miss:>8}{hit:>8}{hit / (hit + miss):>8.0%}")
+
+
+# Cache condivisa da tutte le chiamate di pulizia del processo
+cache_embedding = CacheEmbedding()
+
+
+def _firma_modello():
+    return f"{BACKEND_SBERT}:{MODELLO_SBERT}"
+
+
+def imposta_backend(backend):
+    """ Sceglie il backend di SBERT ("torch" o "onnx"); il modello viene ricaricato al prossimo utilizzo. """
+    global BACKEND_SBERT, _model
+    if backend not in ("torch", "onnx"):
+        raise ValueError(f"Backend SBERT sconosciuto: {backend}")
+    with _lock_model:
+        BACKEND_SBERT = backend
+        _model = None
+    cache_embedding.svuota()  # gli embedding dei due backend non sono identici
+
+
+def get_model():
+    """ Modello SBERT condiviso, caricato al primo utilizzo (anche da più thread insieme). """
+    global _model
+    if _model is None:
+        with _lock_model:
+            if _model is None:
+                if BACKEND_SBERT == "onnx":
+                    _model = SbertOnnx()
+                else:
+                    from sentence_transformers import SentenceTransformer
+                    _model = SentenceTransformer(MODELLO_SBERT)
+    return _model
 
 def text_similarity_sbert(text1, text2):
     """ Calcola la similarità coseno usando Sentence-BERT """
-    vec1 = model.encode(text1).reshape(1, -1)
-    vec2 = model.encode(text2).reshape(1, -1)
+    from sklearn.metrics.pairwise import cosine_similarity
+    vec1 = get_model().encode(text1).reshape(1, -1)
+    vec2 = get_model().encode(text2).reshape(1, -1)
     return cosine_similarity(vec1, vec2)[0][0]
 
 def detect_main_language(text):
@@ -25,79 +244,144 @@ def detect_main_language(text):
         return "unknown"
 
 
-#funzione per pulire l'html recuperando solo l'articolo
-def clean_html_content(html_content, similarity_threshold=0.35, h2_similarity_threshold=0.35):
+def encode_normalizzati(testi, dominio=None):
+    """ Embedding SBERT normalizzati (norma 1) di tutti i testi, come matrice (una riga per testo):
+    la similarità coseno tra due righe diventa un semplice prodotto scalare. I testi già in
+    cache_embedding non vengono ricodificati, gli altri in un'unica chiamata a batch.
+    `dominio` serve solo alle statistiche della cache. """
+    import numpy as np
+
+    chiavi = [CacheEmbedding.chiave(testo) for testo in testi]
+    vettori = cache_embedding.cerca(chiavi, dominio)
+    mancanti = [i for i, vettore in enumerate(vettori) if vettore is None]
+    if mancanti:
+        nuovi = get_model().encode([testi[i] for i in mancanti], batch_size=BATCH_SIZE_SBERT,
+                                   normalize_embeddings=True, convert_to_numpy=True)
+        cache_embedding.aggiungi([chiavi[i] for i in mancanti], nuovi)
+        for i, vettore in zip(mancanti, nuovi):
+            vettori[i] = vettore
+    return np.stack(vettori)
+
+
+def _passi_dopo_titolo(elements):
     """
-    Pulisce il codice HTML lavorando solo sul contenuto dentro <body>, rimuovendo contenuti prima di <h1>,
-    filtrando i paragrafi incoerenti con il precedente, confrontando <h2> + successivo tag con il titolo <h1>,
-    ed eliminando il contenuto se è scritto in una lingua diversa dall'italiano.
+    Primo passaggio sui tag dopo <h1>: ricava i testi da confrontare senza calcolare nulla.
+    Ritorna una lista di passi (header <h2> o None, testo): un passo con header è il blocco
+    <h2> + tag successivo da confrontare con il titolo, uno senza è un paragrafo normale.
+    """
+    passi = []
+    last_header = None  # Per gestire il confronto <h2> + successivo tag
 
-    Args:
-        html_content (str): Il codice HTML della pagina.
-        similarity_threshold (float): Soglia per il confronto tra paragrafi.
-        h2_similarity_threshold (float): Soglia più bassa per confrontare <h2> + successivo tag con <h1>.
+    for element in elements:
+        text = element.get_text(separator=" ", strip=True)
 
-    Returns:
-        str: Testo pulito mantenendo solo i paragrafi coerenti, oppure stringa vuota se il risultato è troppo breve, troppo lungo o scritto in un'altra lingua.
+        # Rimuoviamo elementi vuoti o troppo brevi
+        if not text or len(text) < 5:
+            continue
+
+        # Se è un <h2>, lo salviamo temporaneamente per unirlo al successivo
+        if element.name == "h2":
+            last_header = text
+            continue
+
+        passi.append((last_header, text))
+        last_header = None
+    return passi
+
+
+def filtra_paragrafi(html_content, similarity_threshold=0.35, h2_similarity_threshold=0.35, dominio=None):
+    """
+    Parte di clean_html_content che usa SBERT: tiene il titolo <h1> e i paragrafi successivi coerenti.
+    Ritorna (testi tenuti, decisioni), dove ogni decisione è (similarità o None, soglia o None, tenuto)
+    per ogni passo in ordine, oppure None se la pagina non ha <body> o <h1>.
+    Le decisioni servono a confrontare backend diversi del modello (vedi esportazioneOnnx.py).
     """
     soup = BeautifulSoup(html_content, "html.parser")
     
     # Consideriamo solo il contenuto dentro il <body>
     body = soup.body
     if not body:
-        return ""  # Se non c'è un <body>, ritorniamo stringa vuota
+        return None
     
     # Troviamo il primo <h1> e usiamolo come riferimento principale
     elements = body.find_all(["h1", "h2", "p"])
     h1_index = next((i for i, el in enumerate(elements) if el.name == "h1"), None)
 
     if h1_index is None:
-        return ""  # Se non c'è un <h1>, ritorniamo stringa vuota
+        return None
 
     # Estrarre il titolo <h1>
     title = elements[h1_index].get_text(separator=" ", strip=True)
 
-    # Manteniamo solo i tag dopo il primo <h1>
-    elements = elements[h1_index:]
-
-    filtered_text = [title]  # Lista per raccogliere solo il testo senza tag
-    previous_text = None  # Per confronto tra paragrafi normali
-    last_header = None  # Per gestire il confronto <h2> + successivo tag
+    # Manteniamo solo i tag dopo il primo <h1> (escluso)
+    passi = _passi_dopo_titolo(elements[h1_index + 1:])
 
-    for i, element in enumerate(elements[1:]):  # Escludiamo il primo elemento (<h1>)
-        text = element.get_text(separator=" ", strip=True)
+    # Indice di ogni testo distinto nella matrice degli embedding: ogni testo viene codificato una sola volta
+    indici = {}
+    for testo in [title] + [
+        header + " " + text if header else text for header, text in passi
+    ] + [text for _, text in passi]:
+        indici.setdefault(testo, len(indici))
+    embeddings = encode_normalizzati(list(indici), dominio)
 
-        # Rimuoviamo elementi vuoti o troppo brevi
-        if not text or len(text) < 5:
-            continue
+    def similarita(testo1, testo2):
+        return float(embeddings[indici[testo1]] @ embeddings[indici[testo2]])
 
-        # Se è un <h2>, lo salviamo temporaneamente per confrontarlo con il successivo
-        if element.name == "h2":
-            last_header = text
-            continue
+    filtered_text = [title]  # Lista per raccogliere solo il testo senza tag
+    decisioni = []
+    previous_text = None  # Per confronto tra paragrafi normali
 
-        # Se avevamo un <h2>, confrontiamo con <h1>
+    for last_header, text in passi:
+        # Se avevamo un <h2>, confrontiamo <h2> + tag successivo con <h1>
         if last_header:
-            combined_text = last_header + " " + text
-            similarity = text_similarity_sbert(title, combined_text)
-
-            if similarity >= h2_similarity_threshold:
+            similarity = similarita(title, last_header + " " + text)
+            tenuto = similarity >= h2_similarity_threshold
+            decisioni.append((similarity, h2_similarity_threshold, tenuto))
+            if tenuto:
                 filtered_text.append(last_header)
                 filtered_text.append(text)
                 previous_text = text
-            last_header = None
             continue
 
         # Per tutti gli altri elementi, confrontiamo con il paragrafo precedente
         if previous_text:
-            similarity = text_similarity_sbert(previous_text, text)
-            if similarity >= similarity_threshold:
+            similarity = similarita(previous_text, text)
+            tenuto = similarity >= similarity_threshold
+            decisioni.append((similarity, similarity_threshold, tenuto))
+            if tenuto:
                 filtered_text.append(text)
                 previous_text = text
         else:
+            decisioni.append((None, None, True))
             filtered_text.append(text)
             previous_text = text
 
+    return filtered_text, decisioni
+
+
+#funzione per pulire l'html recuperando solo l'articolo
+def clean_html_content(html_content, similarity_threshold=0.35, h2_similarity_threshold=0.35, dominio=None):
+    """
+    Pulisce il codice HTML lavorando solo sul contenuto dentro <body>, rimuovendo contenuti prima di <h1>,
+    filtrando i paragrafi incoerenti con il precedente, confrontando <h2> + successivo tag con il titolo <h1>,
+    ed eliminando il contenuto se è scritto in una lingua diversa dall'italiano.
+    Tutti i testi della pagina (titolo, blocchi <h2> + successivo, paragrafi) vengono codificati con SBERT
+    in un'unica chiamata a batch; i confronti usano poi la matrice degli embedding.
+
+    Args:
+        html_content (str): Il codice HTML della pagina.
+        similarity_threshold (float): Soglia per il confronto tra paragrafi.
+        h2_similarity_threshold (float): Soglia più bassa per confrontare <h2> + successivo tag con <h1>.
+        dominio (str): Sito della pagina, per le statistiche della cache degli embedding (opzionale).
+
+    Returns:
+        str: Testo pulito mantenendo solo i paragrafi coerenti, oppure stringa vuota se il risultato è troppo breve, troppo lungo o scritto in un'altra lingua.
+    """
+    risultato = filtra_paragrafi(html_content, similarity_threshold, h2_similarity_threshold, dominio)
+    if risultato is None:
+        return ""  # Se non c'è un <body> o un <h1>, ritorniamo stringa vuota
+    filtered_text, _ = risultato
+
     # Se il numero di elementi è troppo basso, scartiamo il contenuto
     if len(filtered_text) < 3:
         return ""
@@ -117,3 +401,109 @@ def clean_html_content(html_content, similarity_threshold=0.35, h2_similarity_th
     return "\n".join(filtered_text)
 
 
+
+
+# === Pulizia in parallelo su un pool di processi ===
+# BeautifulSoup e langdetect sono Python puro: con i thread la pulizia usa di fatto un solo core.
+# Ogni processo del pool carica SBERT una sola volta all'avvio; le pagine viaggiano come testo.
+# I processi sono avviati con "spawn" (non "fork"): il processo principale ha già thread e browser attivi.
+
+def _inizializza_processo_pulizia(backend, percorso_cache):
+    imposta_backend(backend)
+    if percorso_cache:
+        cache_embedding.carica(percorso_cache, stampa=False)
+    cache_embedding.nuovi = []
+    get_model()
+
+
+def _pulisci_pagina(html, similarity_threshold, h2_similarity_threshold, dominio):
+    """clean_html_content che non solleva eccezioni: una pagina malformata non ferma il lotto."""
+    if not html:
+        return ""
+    try:
+        return clean_html_content(html, similarity_threshold, h2_similarity_threshold, dominio)
+    except Exception as e:
+        print(f"❌ Errore durante la pulizia di una pagina ({dominio or 'dominio sconosciuto'}): {e}")
+        return ""
+
+
+def _pulisci_in_processo(html, similarity_threshold, h2_similarity_threshold, dominio):
+    contenuto = _pulisci_pagina(html, similarity_threshold, h2_similarity_threshold, dominio)
+    return (contenuto, *cache_embedding.estrai_novita())
+
+
+def _risultato_processo(futuro):
+    # Statistiche e nuovi embedding del processo confluiscono nella cache di questo processo
+    contenuto, hit, miss, nuovi = futuro.result()
+    cache_embedding.unisci(hit, miss, nuovi)
+    return contenuto
+
+
+def _processo_pronto():
+    time.sleep(0.05)  # lascia i lavori successivi agli altri processi già pronti
+    return os.getpid()
+
+
+def crea_pool_pulizia(workers=NUM_PROCESSI_PULIZIA):
+    """
+    Pool di processi per pulisci_nel_pool(); va chiuso con shutdown() (o usato in un with).
+
+    Avvia subito tutti i processi e aspetta che abbiano caricato il modello: se il caricamento
+    fallisce (modello ONNX non esportato, torch mancante...) l'errore arriva qui, prima di pulire
+    qualsiasi pagina, invece di un BrokenProcessPool a ogni pagina.
+    """
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_inizializza_processo_pulizia,
+        initargs=(BACKEND_SBERT, cache_embedding.percorso),
+    )
+    try:
+        pronti = set()
+        while len(pronti) < workers:
+            pronti.update(futuro.result() for futuro in [pool.submit(_processo_pronto) for _ in range(workers)])
+    except BrokenProcessPool as e:
+        pool.shutdown()
+        raise RuntimeError(f"Caricamento del modello SBERT (backend {BACKEND_SBERT}) fallito nei processi di pulizia: "
+                           f"vedere l'errore stampato sopra") from e
+    return pool
+
+
+def pulisci_nel_pool(pool, html_content, similarity_threshold=0.35, h2_similarity_threshold=0.35, dominio=None):
+    """ clean_html_content eseguita da un processo di `pool`; blocca il thread chiamante fino al risultato. """
+    return _risultato_processo(
+        pool.submit(_pulisci_in_processo, html_content, similarity_threshold, h2_similarity_threshold, dominio)
+    )
+
+
+def clean_html_batch(pagine, workers=NUM_PROCESSI_PULIZIA, similarity_threshold=0.35, h2_similarity_threshold=0.35,
+                     in_volo=None):
+    """
+    Pulisce molte pagine in parallelo su `workers` processi e genera i contenuti puliti nello stesso
+    ordine delle pagine, man mano che sono pronti.
+
+    Args:
+        pagine: Iterabile di HTML oppure di coppie (HTML, dominio); viene letto man mano, con al più
+            `in_volo` pagine (default 2 per processo) in lavorazione o in attesa di essere restituite.
+        workers (int): Processi da usare; con 1 le pagine vengono pulite in questo processo.
+
+    Yields:
+        str: Il risultato di clean_html_content per ogni pagina ("" anche se la pulizia fallisce).
+    """
+    coppie = ((p, None) if p is None or isinstance(p, str) else p for p in pagine)
+
+    if workers <= 1:
+        get_model()  # un errore di caricamento del modello ferma il lotto, non diventa "" per ogni pagina
+        for html, dominio in coppie:
+            yield _pulisci_pagina(html, similarity_threshold, h2_similarity_threshold, dominio)
+        return
+
+    in_volo = in_volo or 2 * workers
+    with crea_pool_pulizia(workers) as pool:
+        futuri = deque()
+        for html, dominio in coppie:
+            futuri.append(pool.submit(_pulisci_in_processo, html, similarity_threshold, h2_similarity_threshold, dominio))
+            if len(futuri) >= in_volo:
+                yield _risultato_processo(futuri.popleft())
+        while futuri:
+            yield _risultato_processo(futuri.popleft())
@@ -0,0 +1,109 @@
+"""
+Compressione dei corpi degli articoli (articoli.articolo_completo_html).
+
+Uso (dalla root del progetto):
+    python compressioneArticoli.py benchmark [--campioni 2000]
+    python compressioneArticoli.py migra [--modalita zlib|zstd|nessuna] [--dizionario] [--no-vacuum]
+
+- benchmark: confronta dimensione e velocità di compressione/decompressione delle modalità
+             disponibili su un campione di articoli del DB (il DB non viene modificato)
+- migra:     riscrive una tantum tutti i corpi già salvati nella modalità scelta;
+             con --dizionario addestra prima un dizionario zstd sugli articoli esistenti
+"""
+
+import argparse
+import time
+import zlib
+
+import database
+
+
+def _campione_corpi(max_campioni):
+    righe = database.get_connessione().execute("""
+        SELECT articolo_completo_html
+        FROM articoli
+        WHERE articolo_completo_html IS NOT NULL AND articolo_completo_html NOT IN ('NESSUN CONTENUTO', 'ARCHIVIATO')
+        ORDER BY id DESC
+        LIMIT ?
+    """, (max_campioni,)).fetchall()
+    return [database.decomprimi_corpo(valore).encode("utf-8") for (valore,) in righe]
+
+
+def _codec_da_confrontare(corpi):
+    """Ritorna {nome: (comprimi, decomprimi)} per ogni modalità disponibile."""
+    codec = {
+        "nessuna": (lambda b: b, lambda b: b),
+        f"zlib-{database.LIVELLO_ZLIB}": (
+            lambda b: zlib.compress(b, database.LIVELLO_ZLIB),
+            zlib.decompress,
+        ),
+    }
+
+    zstandard = database.zstandard
+    if zstandard is None:
+        print("ℹ️ Pacchetto 'zstandard' non installato: confronto solo zlib.")
+        return codec
+
+    compressore = zstandard.ZstdCompressor(level=database.LIVELLO_ZSTD)
+    decompressore = zstandard.ZstdDecompressor()
+    codec[f"zstd-{database.LIVELLO_ZSTD}"] = (compressore.compress, decompressore.decompress)
+
+    # Dizionario addestrato su metà del campione e misurato sull'altra metà
+    if len(corpi) >= 20:
+        dizionario = zstandard.train_dictionary(112_640, corpi[::2])
+        compressore_d = zstandard.ZstdCompressor(level=database.LIVELLO_ZSTD, dict_data=dizionario)
+        decompressore_d = zstandard.ZstdDecompressor(dict_data=dizionario)
+        codec[f"zstd-{database.LIVELLO_ZSTD}+dizionario"] = (compressore_d.compress, decompressore_d.decompress)
+
+    return codec
+
+
+def benchmark(max_campioni=2000):
+    corpi = _campione_corpi(max_campioni)
+    if not corpi:
+        print("✅ Nessun articolo con contenuto nel DB: niente da misurare.")
+        return
+
+    codec = _codec_da_confrontare(corpi)
+    totale = sum(len(b) for b in corpi)
+    print(f"📊 Campione: {len(corpi)} articoli, {totale / 1e6:.2f} MB di testo\n")
+    print(f"{'modalità':<24}{'MB':>8}{'rapporto':>10}{'comp. MB/s':>12}{'decomp. MB/s':>14}")
+
+    for nome, (comprimi, decomprimi) in codec.items():
+        t0 = time.perf_counter()
+        compressi = [comprimi(b) for b in corpi]
+        t1 = time.perf_counter()
+        for c in compressi:
+            decomprimi(c)
+        t2 = time.perf_counter()
+
+        dimensione = sum(len(c) for c in compressi)
+        velocita_c = totale / 1e6 / max(t1 - t0, 1e-9)
+        velocita_d = totale / 1e6 / max(t2 - t1, 1e-9)
+        print(f"{nome:<24}{dimensione / 1e6:>8.2f}{totale / dimensione:>10.2f}{velocita_c:>12.1f}{velocita_d:>14.1f}")
+
+
+def migra(modalita, dizionario, vacuum):
+    database.migra_database()
+    if dizionario:
+        database.addestra_dizionario_zstd()
+    database.ricomprimi_corpi_articoli(modalita, vacuum=vacuum)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compressione dei corpi degli articoli")
+    comandi = parser.add_subparsers(dest="comando", required=True)
+
+    p_bench = comandi.add_parser("benchmark", help="confronta le modalità di compressione")
+    p_bench.add_argument("--campioni", type=int, default=2000)
+
+    p_migra = comandi.add_parser("migra", help="riscrive i corpi esistenti nella modalità scelta")
+    p_migra.add_argument("--modalita", choices=["nessuna", "zlib", "zstd"], default=database.COMPRESSIONE_CORPO)
+    p_migra.add_argument("--dizionario", action="store_true", help="addestra prima un dizionario zstd")
+    p_migra.add_argument("--no-vacuum", action="store_true", help="non compattare il file al termine")
+
+    args = parser.parse_args()
+    if args.comando == "benchmark":
+        benchmark(args.campioni)
+    else:
+        migra(args.modalita, args.dizionario, not args.no_vacuum)
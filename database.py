@@ -1,156 +1,1088 @@
 import sqlite3
+import threading
+import atexit
+import os
+import re
+import zlib
+import hashlib
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import zstandard  # opzionale: pip install zstandard
+except ImportError:
+    zstandard = None
 
 DB_PATH = "crypto_news.db"
 
+# DB "freddo" con i contenuti degli articoli vecchi (vedi archivia_articoli): se il file esiste
+# viene collegato (ATTACH) a ogni connessione con lo schema "archivio".
+ARCHIVIO_PATH = "crypto_news_archivio.db"
+
+# Pragma applicati a ogni nuova connessione:
+# - WAL: i lettori (es. generazione report) non bloccano gli scrittori e viceversa
+# - synchronous=NORMAL: in WAL niente fsync a ogni commit, solo ai checkpoint
+# - cache/mmap più ampi per ridurre le letture da disco sulle tabelle degli articoli
+PRAGMA_CONNESSIONE = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-32000",      # ~32 MB di page cache (valore negativo = KiB)
+    "PRAGMA mmap_size=268435456",    # 256 MB di memory-mapped I/O
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=10000",     # attende fino a 10 s se un altro processo sta scrivendo
+)
+
+# Una connessione per thread (e per processo): sqlite3 non permette di condividere
+# la stessa connessione tra thread diversi senza sincronizzazione esterna.
+_locale = threading.local()
+
+
+# === Gestione connessioni ===
+def get_connessione():
+    """
+    Restituisce la connessione condivisa del thread corrente, creandola al primo utilizzo.
+    La connessione è in autocommit: le scritture vanno eseguite dentro `transazione()`.
+    """
+    chiave = (os.getpid(), DB_PATH)
+    conn = getattr(_locale, "conn", None)
+
+    if conn is not None and _locale.chiave != chiave:
+        # Cambio di DB_PATH nello stesso processo: chiudiamo la vecchia connessione.
+        # Dopo un fork invece la connessione ereditata non va toccata, la scartiamo e basta.
+        if _locale.chiave[0] == os.getpid():
+            conn.close()
+        conn = None
+
+    if conn is None:
+        conn = sqlite3.connect(DB_PATH, isolation_level=None)
+        for pragma in PRAGMA_CONNESSIONE:
+            conn.execute(pragma)
+        if os.path.exists(ARCHIVIO_PATH):
+            _collega_archivio(conn)
+        _locale.conn = conn
+        _locale.chiave = chiave
+
+    return conn
+
+
+@contextmanager
+def transazione():
+    """
+    Apre una transazione esplicita (BEGIN IMMEDIATE) e restituisce un cursore.
+    Commit all'uscita, rollback in caso di eccezione. Se è già aperta una transazione
+    sulla connessione del thread, quella interna partecipa alla transazione esterna.
+    """
+    conn = get_connessione()
+    if conn.in_transaction:
+        yield conn.cursor()
+        return
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn.cursor()
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+
+
+def chiudi_connessione():
+    """Chiude la connessione del thread corrente (se aperta)."""
+    conn = getattr(_locale, "conn", None)
+    if conn is not None and _locale.chiave[0] == os.getpid():
+        conn.close()
+    _locale.conn = None
+
+
+atexit.register(chiudi_connessione)
+
+
+# === Archivio dei contenuti vecchi ===
+# I contenuti spostati nell'archivio vengono sostituiti in articoli dal segnaposto ARCHIVIATO:
+# le colonne restano NOT NULL, quindi gli articoli non rientrano nelle code di lavoro.
+ARCHIVIATO = "ARCHIVIATO"
+
+
+def _collega_archivio(conn):
+    conn.execute("ATTACH DATABASE ? AS archivio", (ARCHIVIO_PATH,))
+    conn.execute("PRAGMA archivio.journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS archivio.articoli_archiviati (
+            id INTEGER PRIMARY KEY,
+            articolo_completo_html BLOB,
+            riassunto_breve TEXT,
+            riassunto_lungo TEXT,
+            archiviato_il DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def archivio_collegato(conn=None):
+    conn = conn or get_connessione()
+    return any(riga[1] == "archivio" for riga in conn.execute("PRAGMA database_list"))
+
+
+def colonna_con_archivio(colonna, alias="articoli", conn=None):
+    """
+    Espressione SQL che legge `colonna` di articoli (alias `alias`) recuperandola
+    dall'archivio quando il valore è stato spostato. Senza archivio collegato a `conn`
+    (default: la connessione del thread) è la colonna stessa.
+    """
+    if not archivio_collegato(conn):
+        return f"{alias}.{colonna}"
+    return (f"CASE WHEN {alias}.{colonna} = '{ARCHIVIATO}' "
+            f"THEN (SELECT arc.{colonna} FROM archivio.articoli_archiviati AS arc WHERE arc.id = {alias}.id) "
+            f"ELSE {alias}.{colonna} END")
+
+
+def archivia_articoli(giorni=30, includi_riassunti=False, dimensione_blocco=500, vacuum=False):
+    """
+    Sposta nel DB di archivio (ARCHIVIO_PATH) i contenuti degli articoli pubblicati più di
+    `giorni` giorni fa e già riassunti; con includi_riassunti=True sposta anche i riassunti.
+    Le funzioni di lettura di questo modulo e i report li recuperano in modo trasparente.
+    I segnaposto 'NESSUN CONTENUTO' restano nel DB principale: se diventassero ARCHIVIATO
+    passerebbero i filtri dei report e di daily_stats, che li escludono confrontando il testo.
+    I riassunti archiviati restano cercabili con cerca_articoli: l'indice full-text tiene il testo originale.
+    Con vacuum=True compatta il DB principale al termine. Ritorna il numero di articoli archiviati.
+    """
+    conn = get_connessione()
+    if not archivio_collegato(conn):
+        _collega_archivio(conn)
+
+    colonne = ["articolo_completo_html"]
+    if includi_riassunti:
+        colonne += ["riassunto_breve", "riassunto_lungo"]
+    da_archiviare = " OR ".join(f"a.{c} NOT IN ('{ARCHIVIATO}', 'NESSUN CONTENUTO')" for c in colonne)
+
+    ultimo_id, archiviati = 0, 0
+    while True:
+        righe = conn.execute(f"""
+            SELECT a.id, {", ".join(f"a.{c}" for c in colonne)}
+            FROM articoli AS a
+            JOIN meta_articoli AS ma ON ma.id = a.id
+            WHERE a.id > ?
+              AND ma.data < DATE('now', ?)
+              AND a.articolo_completo_html IS NOT NULL AND a.articolo_completo_html != 'NESSUN CONTENUTO'
+              AND a.riassunto_breve IS NOT NULL AND a.riassunto_lungo IS NOT NULL
+              AND ({da_archiviare})
+            ORDER BY a.id
+            LIMIT ?
+        """, (ultimo_id, f"-{int(giorni)} days", dimensione_blocco)).fetchall()
+        if not righe:
+            break
+
+        # Prima la copia nell'archivio, poi il segnaposto nel DB principale: le due transazioni
+        # sono separate (in WAL non esistono transazioni atomiche tra più file), ma un'interruzione
+        # tra le due lascia solo una copia in più, che la prossima esecuzione sovrascrive.
+        # Un valore già archiviato (es. il corpo, archiviando poi anche i riassunti) resta quello in archivio.
+        with transazione() as cursor:
+            for riga in righe:
+                cursor.execute(f"""
+                    INSERT INTO archivio.articoli_archiviati (id, {", ".join(colonne)})
+                    VALUES (?, {", ".join("?" * len(colonne))})
+                    ON CONFLICT(id) DO UPDATE SET
+                    {", ".join(f"{c} = CASE WHEN excluded.{c} = '{ARCHIVIATO}' THEN {c} ELSE excluded.{c} END"
+                               for c in colonne)}
+                """, riga)
+        with transazione() as cursor:
+            cursor.executemany(f"""
+                UPDATE articoli
+                SET {", ".join(f"{c} = CASE WHEN {c} = 'NESSUN CONTENUTO' THEN {c} ELSE '{ARCHIVIATO}' END"
+                               for c in colonne)}
+                WHERE id = ?
+            """, [(riga[0],) for riga in righe])
+
+        archiviati += len(righe)
+        ultimo_id = righe[-1][0]
+
+    if vacuum:
+        conn.execute("VACUUM main")
+
+    print(f"🧊 {archiviati} articoli spostati nell'archivio ({ARCHIVIO_PATH}).")
+    return archiviati
+
+
+# === Scritture bufferizzate ===
+# Numero di righe accumulate prima di scriverle in un'unica transazione.
+DIMENSIONE_FLUSH = 25
+
+
+class BufferScrittura:
+    """
+    Accumula le righe da scrivere e le passa alla funzione bulk indicata
+    (es. salva_html_articoli_bulk) ogni `dimensione_flush` righe.
+    Usato come context manager, all'uscita salva anche le righe rimaste nel buffer,
+    pure in caso di eccezione, così il lavoro già fatto non va perso.
+    """
+
+    def __init__(self, funzione_bulk, dimensione_flush=DIMENSIONE_FLUSH):
+        self.funzione_bulk = funzione_bulk
+        self.dimensione_flush = max(1, dimensione_flush)
+        self.righe = []
+
+    def aggiungi(self, *riga):
+        self.righe.append(riga)
+        if len(self.righe) >= self.dimensione_flush:
+            self.flush()
+
+    def flush(self):
+        if self.righe:
+            righe, self.righe = self.righe, []
+            self.funzione_bulk(righe)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+        return False
+
+
+# === Lettura a pagine ===
+# Righe lette per pagina dagli iteratori itera_*: la memoria resta costante
+# indipendentemente da quanti articoli sono in coda.
+DIMENSIONE_PAGINA = 200
+
+
+def _itera_a_pagine(query, dimensione_pagina=DIMENSIONE_PAGINA, da_id=0, trasforma=None, parametri=None):
+    """
+    Esegue `query` a pagine con paginazione keyset (id > ultimo id letto) e restituisce le righe
+    una alla volta. La query deve filtrare con `id > :ultimo_id`, ordinare per id e terminare
+    con `LIMIT :limite`; l'id deve essere la prima colonna. Al posto dell'id si può usare
+    qualunque altra chiave crescente e univoca (es. versione_riga).
+    Ogni pagina viene letta per intero prima di restituirne le righe, quindi durante
+    l'iterazione si può scrivere sul DB senza tenere aperto un cursore di lettura.
+    `da_id` permette di riprendere un'elaborazione interrotta dopo l'ultimo id elaborato.
+    `parametri` sono eventuali altri parametri con nome della query.
+    """
+    conn = get_connessione()
+    ultimo_id = da_id
+    while True:
+        pagina = conn.execute(query, {**(parametri or {}), "ultimo_id": ultimo_id, "limite": dimensione_pagina}).fetchall()
+        for riga in pagina:
+            yield trasforma(riga) if trasforma else riga
+        if len(pagina) < dimensione_pagina:
+            return
+        ultimo_id = pagina[-1][0]
+
+
+# === Stadi della pipeline ===
+# Per ogni stadio: tabella e condizione che identifica gli articoli ancora da lavorare.
+# La stessa condizione è usata sia dalla query della coda di lavoro sia dall'indice
+# parziale corrispondente, così SQLite risponde scorrendo solo le voci ancora in sospeso
+# invece di fare una scansione completa della tabella.
+STADI = {
+    "url": ("meta_articoli", "url_articolo IS NULL"),
+    "html": ("articoli", "articolo_completo_html IS NULL"),
+    "riassunto": ("articoli", "articolo_completo_html IS NOT NULL AND articolo_completo_html != 'NESSUN CONTENUTO' "
+                              "AND (riassunto_breve IS NULL OR riassunto_lungo IS NULL)"),
+    "categoria": ("articoli", "riassunto_lungo IS NOT NULL AND categoria IS NULL"),
+    "peso_sentiment": ("articoli", "categoria IS NOT NULL AND (peso IS NULL OR sentiment IS NULL)"),
+}
+
+# Gli stadi che lavorano sul contenuto saltano gli articoli duplicati di un altro articolo
+# (stesso hash del contenuto): ricevono i risultati copiati dall'articolo canonico.
+SOLO_CANONICI = ("(hash_contenuto IS NULL OR id = "
+                 "(SELECT id_canonico FROM contenuti_canonici WHERE hash = articoli.hash_contenuto))")
+STADI_SU_CONTENUTO = ("riassunto", "categoria", "peso_sentiment")
+
+
+# === Statistiche giornaliere (daily_stats) ===
+# Aggregati per giorno e categoria di peso e sentiment, mantenuti incrementalmente da trigger
+# su articoli: il Fear & Greed Index di un periodo qualsiasi diventa una somma su pochi giorni
+# invece di una scansione di tutti gli articoli del periodo.
+# Un articolo contribuisce se ha peso (>= 0) e sentiment e riassunti validi, gli stessi
+# criteri con cui il report seleziona le news.
+_CONTRIBUISCE_A_DAILY_STATS = (
+    "{r}.peso IS NOT NULL AND {r}.sentiment IS NOT NULL AND {r}.peso >= 0 "
+    "AND {r}.riassunto_breve IS NOT NULL AND {r}.riassunto_breve != 'NESSUN CONTENUTO' "
+    "AND {r}.riassunto_lungo IS NOT NULL AND {r}.riassunto_lungo != 'NESSUN CONTENUTO'"
+)
+
+
+def _sql_aggiungi_a_daily_stats(r):
+    return f"""
+        INSERT INTO daily_stats (giorno, categoria, n, somma_peso, somma_peso_sentiment, somma_sentiment,
+                                 min_sentiment, max_sentiment)
+        SELECT DATE(ma.data), COALESCE({r}.categoria, ''), 1, {r}.peso, {r}.peso * {r}.sentiment, {r}.sentiment,
+               {r}.sentiment, {r}.sentiment
+        FROM meta_articoli AS ma
+        WHERE ma.id = {r}.id AND ma.data IS NOT NULL AND {_CONTRIBUISCE_A_DAILY_STATS.format(r=r)}
+        ON CONFLICT(giorno, categoria) DO UPDATE SET
+            n = n + 1,
+            somma_peso = somma_peso + excluded.somma_peso,
+            somma_peso_sentiment = somma_peso_sentiment + excluded.somma_peso_sentiment,
+            somma_sentiment = somma_sentiment + excluded.somma_sentiment,
+            min_sentiment = MIN(COALESCE(min_sentiment, excluded.min_sentiment), excluded.min_sentiment),
+            max_sentiment = MAX(COALESCE(max_sentiment, excluded.max_sentiment), excluded.max_sentiment);
+    """
+
+
+def _sql_togli_da_daily_stats(r):
+    # Le somme si scalano direttamente; min/max si ricalcolano sul giorno solo se il valore
+    # tolto era proprio il minimo o il massimo.
+    chiave = f"""giorno = (SELECT DATE(data) FROM meta_articoli WHERE id = {r}.id)
+            AND categoria = COALESCE({r}.categoria, '')
+            AND {_CONTRIBUISCE_A_DAILY_STATS.format(r=r)}"""
+    return f"""
+        UPDATE daily_stats SET
+            n = n - 1,
+            somma_peso = somma_peso - {r}.peso,
+            somma_peso_sentiment = somma_peso_sentiment - {r}.peso * {r}.sentiment,
+            somma_sentiment = somma_sentiment - {r}.sentiment
+        WHERE {chiave};
+        UPDATE daily_stats SET (min_sentiment, max_sentiment) = (
+            SELECT MIN(a.sentiment), MAX(a.sentiment)
+            FROM articoli AS a
+            JOIN meta_articoli AS ma ON ma.id = a.id
+            WHERE ma.data >= daily_stats.giorno AND ma.data < DATE(daily_stats.giorno, '+1 day')
+              AND COALESCE(a.categoria, '') = daily_stats.categoria
+              AND {_CONTRIBUISCE_A_DAILY_STATS.format(r="a")}
+        )
+        WHERE {chiave}
+          AND ({r}.sentiment <= min_sentiment OR {r}.sentiment >= max_sentiment);
+    """
+
+
+_SQL_RICOSTRUISCI_DAILY_STATS = f"""
+    INSERT INTO daily_stats (giorno, categoria, n, somma_peso, somma_peso_sentiment, somma_sentiment,
+                             min_sentiment, max_sentiment)
+    SELECT DATE(ma.data), COALESCE(a.categoria, ''), COUNT(*), SUM(a.peso), SUM(a.peso * a.sentiment),
+           SUM(a.sentiment), MIN(a.sentiment), MAX(a.sentiment)
+    FROM articoli AS a
+    JOIN meta_articoli AS ma ON ma.id = a.id
+    WHERE ma.data IS NOT NULL AND {_CONTRIBUISCE_A_DAILY_STATS.format(r="a")}
+    GROUP BY DATE(ma.data), COALESCE(a.categoria, '')
+"""
+
+
+# Riga (alias `r`) con i riassunti ancora in articoli: per quelle archiviate l'indice full-text
+# contiene il testo originale, che i trigger non possono leggere dall'archivio
+_FTS_SENZA_SEGNAPOSTO = (f"{{r}}.riassunto_breve IS NOT '{ARCHIVIATO}' "
+                         f"AND {{r}}.riassunto_lungo IS NOT '{ARCHIVIATO}'")
+
+
+# Assegna all'articolo la prossima versione di riga (MAX sull'indice idx_articoli_versione)
+_SQL_NUOVA_VERSIONE = """
+    UPDATE articoli SET versione_riga = (SELECT COALESCE(MAX(versione_riga), 0) + 1 FROM articoli)
+    WHERE id = {id};
+"""
+
+
+# === Migrazioni dello schema ===
+# Ogni voce è la lista di passi di una versione: statement SQL oppure funzioni che
+# ricevono il cursore (per i passi che richiedono Python, es. il ricalcolo di valori).
+# PRAGMA user_version registra l'ultima versione applicata, quindi migra_database() è idempotente.
+MIGRAZIONI = [
+    # 1: indici parziali per le code di lavoro + indice sulla data usato dai report
+    [
+        f"CREATE INDEX IF NOT EXISTS idx_da_lavorare_{stadio} ON {tabella}(id) WHERE {condizione}"
+        for stadio, (tabella, condizione) in STADI.items()
+    ] + [
+        "CREATE INDEX IF NOT EXISTS idx_meta_articoli_data ON meta_articoli(data)",
+        "ANALYZE",
+    ],
+    # 2: dizionari zstd addestrati sui corpi degli articoli (compressione dei contenuti)
+    [
+        """CREATE TABLE IF NOT EXISTS dizionari_compressione (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            dati BLOB NOT NULL,
+            creato_il DATETIME DEFAULT CURRENT_TIMESTAMP
+        )""",
+    ],
+    # 3: indice full-text (FTS5) su titolo e riassunti, sincronizzato con articoli tramite trigger.
+    #    Archiviando i riassunti (archivia_articoli) l'indice tiene il testo originale: i trigger ignorano
+    #    le righe con il segnaposto, il cui testo indicizzato non è più in articoli (vedi ricostruisci_indice_fts)
+    [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS articoli_fts USING fts5(
+            titolo, riassunto_breve, riassunto_lungo,
+            content='articoli', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )""",
+        """CREATE TRIGGER IF NOT EXISTS articoli_fts_ai AFTER INSERT ON articoli BEGIN
+            INSERT INTO articoli_fts(rowid, titolo, riassunto_breve, riassunto_lungo)
+            VALUES (new.id, new.titolo, new.riassunto_breve, new.riassunto_lungo);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS articoli_fts_ad AFTER DELETE ON articoli
+        WHEN {_FTS_SENZA_SEGNAPOSTO.format(r="old")} BEGIN
+            INSERT INTO articoli_fts(articoli_fts, rowid, titolo, riassunto_breve, riassunto_lungo)
+            VALUES ('delete', old.id, old.titolo, old.riassunto_breve, old.riassunto_lungo);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS articoli_fts_au
+        AFTER UPDATE OF titolo, riassunto_breve, riassunto_lungo ON articoli
+        WHEN {_FTS_SENZA_SEGNAPOSTO.format(r="old")} AND {_FTS_SENZA_SEGNAPOSTO.format(r="new")} BEGIN
+            INSERT INTO articoli_fts(articoli_fts, rowid, titolo, riassunto_breve, riassunto_lungo)
+            VALUES ('delete', old.id, old.titolo, old.riassunto_breve, old.riassunto_lungo);
+            INSERT INTO articoli_fts(rowid, titolo, riassunto_breve, riassunto_lungo)
+            VALUES (new.id, new.titolo, new.riassunto_breve, new.riassunto_lungo);
+        END""",
+        "INSERT INTO articoli_fts(articoli_fts) VALUES ('rebuild')",
+    ],
+    # 4: hash del contenuto normalizzato e tabella hash -> articolo canonico (deduplicazione)
+    [
+        "ALTER TABLE articoli ADD COLUMN hash_contenuto TEXT",
+        """CREATE TABLE IF NOT EXISTS contenuti_canonici (
+            hash TEXT PRIMARY KEY,
+            id_canonico INTEGER NOT NULL
+        ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS idx_articoli_hash ON articoli(hash_contenuto) WHERE hash_contenuto IS NOT NULL",
+        lambda cursor: _calcola_hash_esistenti(cursor),
+    ],
+    # 5: aggregati giornalieri di peso/sentiment per categoria, aggiornati da trigger
+    [
+        """CREATE TABLE IF NOT EXISTS daily_stats (
+            giorno TEXT NOT NULL,
+            categoria TEXT NOT NULL,
+            n INTEGER NOT NULL,
+            somma_peso REAL NOT NULL,
+            somma_peso_sentiment REAL NOT NULL,
+            somma_sentiment REAL NOT NULL,
+            min_sentiment REAL,
+            max_sentiment REAL,
+            PRIMARY KEY (giorno, categoria)
+        ) WITHOUT ROWID""",
+        f"""CREATE TRIGGER IF NOT EXISTS daily_stats_ai AFTER INSERT ON articoli
+        WHEN {_CONTRIBUISCE_A_DAILY_STATS.format(r="new")} BEGIN
+            {_sql_aggiungi_a_daily_stats("new")}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS daily_stats_ad AFTER DELETE ON articoli
+        WHEN {_CONTRIBUISCE_A_DAILY_STATS.format(r="old")} BEGIN
+            {_sql_togli_da_daily_stats("old")}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS daily_stats_au
+        AFTER UPDATE OF peso, sentiment, categoria, riassunto_breve, riassunto_lungo ON articoli
+        WHEN ({_CONTRIBUISCE_A_DAILY_STATS.format(r="old")}) OR ({_CONTRIBUISCE_A_DAILY_STATS.format(r="new")}) BEGIN
+            {_sql_togli_da_daily_stats("old")}
+            {_sql_aggiungi_a_daily_stats("new")}
+        END""",
+        _SQL_RICOSTRUISCI_DAILY_STATS,
+    ],
+    # 6: versione di riga crescente su articoli, aggiornata da trigger a ogni modifica dei campi
+    #    esportati: permette agli export incrementali di leggere solo le righe cambiate
+    [
+        "ALTER TABLE articoli ADD COLUMN versione_riga INTEGER",
+        "UPDATE articoli SET versione_riga = id",
+        "CREATE INDEX IF NOT EXISTS idx_articoli_versione ON articoli(versione_riga)",
+        f"""CREATE TRIGGER IF NOT EXISTS articoli_versione_ai AFTER INSERT ON articoli BEGIN
+            {_SQL_NUOVA_VERSIONE.format(id="new.id")}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS articoli_versione_au
+        AFTER UPDATE OF titolo, riassunto_breve, riassunto_lungo, categoria, peso, sentiment ON articoli BEGIN
+            {_SQL_NUOVA_VERSIONE.format(id="new.id")}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS meta_articoli_versione_au AFTER UPDATE OF data ON meta_articoli BEGIN
+            {_SQL_NUOVA_VERSIONE.format(id="new.id")}
+        END""",
+    ],
+    # 7: esiti dello scaricamento via HTTP per dominio (quando serve Chrome e quando no)
+    [
+        """CREATE TABLE IF NOT EXISTS metodi_domini (
+            dominio TEXT PRIMARY KEY,
+            http_ok INTEGER NOT NULL DEFAULT 0,
+            http_ko INTEGER NOT NULL DEFAULT 0,
+            aggiornato_il TEXT
+        ) WITHOUT ROWID""",
+    ],
+    # 8: indice dell'archivio su disco dell'HTML grezzo scaricato (vedi archivioHtml.py)
+    [
+        """CREATE TABLE IF NOT EXISTS html_grezzi (
+            id_articolo INTEGER PRIMARY KEY,
+            url TEXT,
+            hash TEXT NOT NULL,
+            salvato_il TEXT
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_html_grezzi_url ON html_grezzi(url)",
+        "CREATE INDEX IF NOT EXISTS idx_html_grezzi_hash ON html_grezzi(hash)",
+    ],
+]
+
+
+def migra_database():
+    """
+    Applica allo schema le migrazioni non ancora eseguite (vedi MIGRAZIONI).
+    Si può chiamare ad ogni avvio: se il DB è già aggiornato non fa nulla.
+    """
+    with transazione() as cursor:
+        versione = cursor.execute("PRAGMA user_version").fetchone()[0]
+        for numero, passi in enumerate(MIGRAZIONI[versione:], start=versione + 1):
+            for passo in passi:
+                if callable(passo):
+                    passo(cursor)
+                else:
+                    cursor.execute(passo)
+            cursor.execute(f"PRAGMA user_version = {numero}")
+            print(f"🔧 Migrazione DB alla versione {numero} applicata.")
+
+
+def conta_articoli_per_stadio():
+    """
+    Ritorna {stadio: numero di articoli ancora da lavorare} per ogni stadio della pipeline.
+    Ogni conteggio usa solo l'indice parziale dello stadio.
+    """
+    conn = get_connessione()
+    conteggi = {}
+    for stadio, (tabella, condizione) in STADI.items():
+        if stadio in STADI_SU_CONTENUTO:
+            condizione = f"{condizione} AND {SOLO_CANONICI}"
+        conteggi[stadio] = conn.execute(f"SELECT COUNT(*) FROM {tabella} WHERE {condizione}").fetchone()[0]
+    return conteggi
+
+
+# === Compressione dei corpi degli articoli ===
+# Modalità con cui viene salvato articolo_completo_html:
+# - "nessuna": testo in chiaro (TEXT)
+# - "zlib":    BLOB compresso con zlib (sempre disponibile)
+# - "zstd":    BLOB compresso con zstandard, con l'ultimo dizionario addestrato se presente
+# La lettura è trasparente qualunque sia la modalità con cui la riga è stata scritta,
+# quindi DB con righe miste (vecchie in chiaro, nuove compresse) funzionano senza migrazione.
+# I segnaposto "NESSUN CONTENUTO" e ARCHIVIATO restano sempre in chiaro: le condizioni in STADI li confrontano.
+COMPRESSIONE_CORPO = "zlib"
+LIVELLO_ZLIB = 6
+LIVELLO_ZSTD = 10
+
+# Primo byte del BLOB: identifica il codec usato
+_CODEC_ZLIB = 1
+_CODEC_ZSTD = 2
+_CODEC_ZSTD_DIZIONARIO = 3   # seguito da 4 byte con l'id del dizionario
+
+_dizionari_zstd = {}          # cache id -> zstandard.ZstdCompressionDict
+_dizionario_attivo = []       # [id] dell'ultimo dizionario, vuota se non ancora letto
+
+
+def _carica_dizionario_zstd(id_dizionario):
+    if id_dizionario not in _dizionari_zstd:
+        riga = get_connessione().execute(
+            "SELECT dati FROM dizionari_compressione WHERE id = ?", (id_dizionario,)
+        ).fetchone()
+        if riga is None:
+            raise ValueError(f"Dizionario di compressione {id_dizionario} non trovato")
+        _dizionari_zstd[id_dizionario] = zstandard.ZstdCompressionDict(riga[0])
+    return _dizionari_zstd[id_dizionario]
+
+
+def _id_dizionario_attivo():
+    if not _dizionario_attivo:
+        riga = get_connessione().execute("SELECT MAX(id) FROM dizionari_compressione").fetchone()
+        _dizionario_attivo.append(riga[0])
+    return _dizionario_attivo[0]
+
+
+def comprimi_corpo(testo, modalita=None):
+    """
+    Restituisce il valore da salvare in articolo_completo_html secondo `modalita`
+    (default COMPRESSIONE_CORPO). None e i segnaposto restano invariati.
+    """
+    modalita = modalita or COMPRESSIONE_CORPO
+    if testo is None or testo in ("NESSUN CONTENUTO", ARCHIVIATO) or modalita == "nessuna":
+        return testo
+
+    dati = testo.encode("utf-8")
+    if modalita == "zlib":
+        return bytes([_CODEC_ZLIB]) + zlib.compress(dati, LIVELLO_ZLIB)
+
+    if modalita == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Compressione zstd richiesta ma il pacchetto 'zstandard' non è installato")
+        id_dizionario = _id_dizionario_attivo()
+        if id_dizionario is None:
+            return bytes([_CODEC_ZSTD]) + zstandard.ZstdCompressor(level=LIVELLO_ZSTD).compress(dati)
+        compressore = zstandard.ZstdCompressor(level=LIVELLO_ZSTD, dict_data=_carica_dizionario_zstd(id_dizionario))
+        return bytes([_CODEC_ZSTD_DIZIONARIO]) + id_dizionario.to_bytes(4, "big") + compressore.compress(dati)
+
+    raise ValueError(f"Modalità di compressione sconosciuta: {modalita}")
+
+
+def decomprimi_corpo(valore):
+    """
+    Restituisce il testo di articolo_completo_html indipendentemente da come è stato salvato.
+    """
+    if not isinstance(valore, bytes):
+        return valore
+
+    codec = valore[0]
+    if codec == _CODEC_ZLIB:
+        return zlib.decompress(valore[1:]).decode("utf-8")
+
+    if zstandard is None:
+        raise RuntimeError("Contenuto compresso con zstd ma il pacchetto 'zstandard' non è installato")
+    if codec == _CODEC_ZSTD:
+        return zstandard.ZstdDecompressor().decompress(valore[1:]).decode("utf-8")
+    if codec == _CODEC_ZSTD_DIZIONARIO:
+        dizionario = _carica_dizionario_zstd(int.from_bytes(valore[1:5], "big"))
+        return zstandard.ZstdDecompressor(dict_data=dizionario).decompress(valore[5:]).decode("utf-8")
+
+    raise ValueError(f"Codec di compressione sconosciuto: {codec}")
+
+
+def addestra_dizionario_zstd(dimensione=112_640, max_campioni=5000):
+    """
+    Addestra un dizionario zstd sui corpi degli articoli già salvati e lo registra come
+    dizionario attivo: le successive compressioni "zstd" lo useranno. Ritorna l'id del dizionario.
+    """
+    if zstandard is None:
+        raise RuntimeError("Il pacchetto 'zstandard' non è installato")
+
+    righe = get_connessione().execute("""
+        SELECT articolo_completo_html
+        FROM articoli
+        WHERE articolo_completo_html IS NOT NULL AND articolo_completo_html NOT IN ('NESSUN CONTENUTO', 'ARCHIVIATO')
+        ORDER BY id DESC
+        LIMIT ?
+    """, (max_campioni,)).fetchall()
+    campioni = [decomprimi_corpo(valore).encode("utf-8") for (valore,) in righe]
+    dizionario = zstandard.train_dictionary(dimensione, campioni)
+
+    with transazione() as cursor:
+        cursor.execute("INSERT INTO dizionari_compressione (dati) VALUES (?)", (dizionario.as_bytes(),))
+        id_dizionario = cursor.lastrowid
+
+    _dizionario_attivo[:] = [id_dizionario]
+    print(f"📚 Dizionario zstd {id_dizionario} addestrato su {len(campioni)} articoli.")
+    return id_dizionario
+
+
+def ricomprimi_corpi_articoli(modalita=None, dimensione_blocco=500, vacuum=True):
+    """
+    Migrazione una tantum: riscrive tutti i corpi degli articoli nella modalità indicata
+    (default COMPRESSIONE_CORPO), un blocco di `dimensione_blocco` righe per transazione.
+    Con vacuum=True compatta il file al termine per restituire lo spazio liberato.
+    Ritorna (righe riscritte, byte prima, byte dopo).
+    """
+    conn = get_connessione()
+    ultimo_id, riscritte, byte_prima, byte_dopo = 0, 0, 0, 0
+
+    while True:
+        righe = conn.execute("""
+            SELECT id, articolo_completo_html
+            FROM articoli
+            WHERE id > ? AND articolo_completo_html IS NOT NULL
+              AND articolo_completo_html NOT IN ('NESSUN CONTENUTO', 'ARCHIVIATO')
+            ORDER BY id
+            LIMIT ?
+        """, (ultimo_id, dimensione_blocco)).fetchall()
+        if not righe:
+            break
+
+        aggiornamenti = []
+        for id_articolo, valore in righe:
+            nuovo = comprimi_corpo(decomprimi_corpo(valore), modalita)
+            byte_prima += len(valore if isinstance(valore, bytes) else valore.encode("utf-8"))
+            byte_dopo += len(nuovo if isinstance(nuovo, bytes) else nuovo.encode("utf-8"))
+            if nuovo != valore:
+                aggiornamenti.append((nuovo, id_articolo))
+
+        with transazione() as cursor:
+            cursor.executemany("UPDATE articoli SET articolo_completo_html = ? WHERE id = ?", aggiornamenti)
+        riscritte += len(aggiornamenti)
+        ultimo_id = righe[-1][0]
+
+    if vacuum:
+        conn.execute("VACUUM")
+
+    print(f"🗜️ {riscritte} corpi riscritti: {byte_prima / 1e6:.1f} MB → {byte_dopo / 1e6:.1f} MB")
+    return riscritte, byte_prima, byte_dopo
+
+
+# === Statistiche per periodo ===
+def get_statistiche_periodo(start, end, categoria=None):
+    """
+    Somma i daily_stats dei giorni tra start e end ('YYYY-MM-DD', estremi inclusi),
+    opzionalmente per una sola categoria. Ritorna un dict con n, somma_peso,
+    somma_peso_sentiment, somma_sentiment, min_sentiment, max_sentiment.
+    """
+    cursor = get_connessione().execute("""
+        SELECT COALESCE(SUM(n), 0), COALESCE(SUM(somma_peso), 0), COALESCE(SUM(somma_peso_sentiment), 0),
+               COALESCE(SUM(somma_sentiment), 0), MIN(min_sentiment), MAX(max_sentiment)
+        FROM daily_stats
+        WHERE giorno BETWEEN ? AND ?
+          AND (? IS NULL OR categoria = ?)
+    """, (start, end, categoria, categoria))
+    colonne = ("n", "somma_peso", "somma_peso_sentiment", "somma_sentiment", "min_sentiment", "max_sentiment")
+    return dict(zip(colonne, cursor.fetchone()))
+
+
+def ricostruisci_daily_stats():
+    """
+    Ricalcola da zero daily_stats dagli articoli (es. dopo modifiche a meta_articoli.data,
+    che i trigger non seguono, o per azzerare eventuali errori di arrotondamento accumulati).
+    """
+    with transazione() as cursor:
+        cursor.execute("DELETE FROM daily_stats")
+        cursor.execute(_SQL_RICOSTRUISCI_DAILY_STATS)
+
+
+# === Deduplicazione dei contenuti ===
+# Lo stesso articolo compare spesso su CryptoPanic da più fonti (mirror, syndication).
+# Ogni corpo salvato riceve un hash del testo normalizzato: il primo articolo con un certo
+# hash è il canonico, gli altri sono duplicati e ricevono riassunti, categoria, peso e
+# sentiment copiati dal canonico invece di passare di nuovo da API e modelli.
+COLONNE_PER_STADIO = {
+    "riassunto": ("riassunto_breve", "riassunto_lungo"),
+    "categoria": ("categoria",),
+    "peso_sentiment": ("peso", "sentiment"),
+}
+
+# Lavoro evitato nel processo corrente: {stadio: articoli duplicati serviti dal canonico}
+lavoro_risparmiato = Counter()
+
+
+def hash_contenuto(testo):
+    """
+    Hash del contenuto normalizzato (minuscolo, senza punteggiatura e spazi ripetuti),
+    None per contenuti assenti o "NESSUN CONTENUTO".
+    """
+    if not testo or testo in ("NESSUN CONTENUTO", ARCHIVIATO):
+        return None
+    normalizzato = " ".join(re.sub(r"[\W_]+", " ", testo.lower()).split())
+    return hashlib.blake2b(normalizzato.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _registra_hash(cursor, righe_hash, copia_risultati=True):
+    """
+    Salva gli hash [(id, hash)], registra come canonico il primo articolo visto per ogni hash
+    e copia nei nuovi duplicati i risultati già disponibili sul rispettivo canonico.
+    Con copia_risultati=False registra solo hash e canonici (nessuna copia, nessun conteggio).
+    """
+    cursor.executemany("UPDATE articoli SET hash_contenuto = ? WHERE id = ?",
+                       [(h, id_articolo) for id_articolo, h in righe_hash])
+    righe_hash = [(id_articolo, h) for id_articolo, h in righe_hash if h is not None]
+    if not righe_hash:
+        return
+    cursor.executemany("INSERT OR IGNORE INTO contenuti_canonici (hash, id_canonico) VALUES (?, ?)",
+                       [(h, id_articolo) for id_articolo, h in righe_hash])
+    if not copia_risultati:
+        return
+
+    ids = [id_articolo for id_articolo, _ in righe_hash]
+    condizione = (f"d.id IN ({', '.join('?' * len(ids))}) "
+                  "AND d.hash_contenuto = h.hash AND d.id != h.id_canonico")
+    riassunti, categorie, pesi = cursor.execute(f"""
+        SELECT COUNT(canon.riassunto_lungo), COUNT(canon.categoria), COUNT(canon.peso)
+        FROM articoli AS d, contenuti_canonici AS h
+        JOIN articoli AS canon ON canon.id = h.id_canonico
+        WHERE {condizione}
+    """, ids).fetchone()
+    # I riassunti del canonico potrebbero essere stati spostati nell'archivio
+    valori = {c: f"canon.{c}" for colonne in COLONNE_PER_STADIO.values() for c in colonne}
+    valori.update({c: colonna_con_archivio(c, "canon") for c in COLONNE_PER_STADIO["riassunto"]})
+    cursor.execute(f"""
+        UPDATE articoli AS d
+        SET {", ".join(f"{c} = COALESCE({valore}, d.{c})" for c, valore in valori.items())}
+        FROM contenuti_canonici AS h
+        JOIN articoli AS canon ON canon.id = h.id_canonico
+        WHERE {condizione}
+    """, ids)
+    lavoro_risparmiato.update(riassunto=riassunti, categoria=categorie, peso_sentiment=pesi)
+
+
+def _copia_ai_duplicati(cursor, ids, stadio):
+    """
+    Dopo la scrittura dei risultati di `stadio` per gli articoli `ids`, copia gli stessi
+    valori sui duplicati di quelli che sono articoli canonici.
+    """
+    if not ids:
+        return
+    colonne = COLONNE_PER_STADIO[stadio]
+    cursor.execute(f"""
+        UPDATE articoli AS d
+        SET {", ".join(f"{c} = canon.{c}" for c in colonne)}
+        FROM contenuti_canonici AS h
+        JOIN articoli AS canon ON canon.id = h.id_canonico
+        WHERE h.id_canonico IN ({", ".join("?" * len(ids))})
+          AND d.hash_contenuto = h.hash AND d.id != h.id_canonico
+    """, list(ids))
+    lavoro_risparmiato[stadio] += cursor.rowcount
+
+
+def _calcola_hash_esistenti(cursor, dimensione_blocco=500):
+    """
+    Passo di migrazione: calcola gli hash dei corpi già salvati, in ordine di id.
+    I duplicati esistenti hanno già i propri risultati: non si sovrascrivono con quelli del canonico
+    e non contano come lavoro risparmiato.
+    """
+    ultimo_id = 0
+    while True:
+        righe = cursor.execute("""
+            SELECT id, articolo_completo_html
+            FROM articoli
+            WHERE id > ? AND articolo_completo_html IS NOT NULL
+            ORDER BY id
+            LIMIT ?
+        """, (ultimo_id, dimensione_blocco)).fetchall()
+        if not righe:
+            break
+        _registra_hash(cursor, [(id_articolo, hash_contenuto(decomprimi_corpo(valore)))
+                                for id_articolo, valore in righe], copia_risultati=False)
+        ultimo_id = righe[-1][0]
+
+
+def stampa_lavoro_risparmiato():
+    """Stampa quanti articoli duplicati hanno evitato ciascuno stadio in questo processo."""
+    if not lavoro_risparmiato:
+        return
+    dettaglio = ", ".join(f"{stadio}: {n}" for stadio, n in sorted(lavoro_risparmiato.items()))
+    print(f"♻️ Articoli duplicati serviti dal contenuto canonico | {dettaglio}")
+
+
+# === Ricerca full-text ===
+# Pesi bm25 delle colonne di articoli_fts: un termine nel titolo conta più che nei riassunti
+PESI_FTS = (3.0, 2.0, 1.0)
+
+
+def cerca_articoli(query, start=None, end=None, categoria=None, limit=50):
+    """
+    Cerca negli articoli (titolo, riassunto_breve, riassunto_lungo) con la sintassi FTS5,
+    es. 'ETF AND SEC', '"spot etf" OR bitcoin', 'regola*'.
+    Filtri opzionali: intervallo di date 'YYYY-MM-DD' (estremi inclusi) e categoria.
+    Ritorna una lista di dict ordinata per rilevanza (bm25, più basso = più rilevante).
+    """
+    cursor = get_connessione().execute(f"""
+        SELECT
+            a.id,
+            a.titolo,
+            ma.data,
+            a.categoria,
+            {colonna_con_archivio("riassunto_breve", "a")} AS riassunto_breve,
+            a.peso,
+            a.sentiment,
+            bm25(articoli_fts, {", ".join(map(str, PESI_FTS))}) AS punteggio
+        FROM articoli_fts
+        JOIN articoli AS a ON a.id = articoli_fts.rowid
+        JOIN meta_articoli AS ma ON ma.id = a.id
+        WHERE articoli_fts MATCH :query
+          AND (:start IS NULL OR ma.data >= :start)
+          AND (:end IS NULL OR ma.data < DATE(:end, '+1 day'))
+          AND (:categoria IS NULL OR a.categoria = :categoria)
+        ORDER BY punteggio
+        LIMIT :limit
+    """, {"query": query, "start": start, "end": end, "categoria": categoria, "limit": limit})
+
+    colonne = [d[0] for d in cursor.description]
+    return [dict(zip(colonne, riga)) for riga in cursor]
+
+
+def ricostruisci_indice_fts():
+    """
+    Ricostruisce da zero l'indice full-text a partire dalla tabella articoli
+    (es. dopo aggiornamenti fatti da script esterni con i trigger disattivati) e lo ottimizza.
+    I riassunti archiviati vengono indicizzati con il testo recuperato dall'archivio.
+    """
+    with transazione() as cursor:
+        cursor.execute("INSERT INTO articoli_fts(articoli_fts) VALUES ('delete-all')")
+        cursor.execute(f"""
+            INSERT INTO articoli_fts(rowid, titolo, riassunto_breve, riassunto_lungo)
+            SELECT a.id, a.titolo,
+                   {colonna_con_archivio("riassunto_breve", "a")}, {colonna_con_archivio("riassunto_lungo", "a")}
+            FROM articoli AS a
+        """)
+        cursor.execute("INSERT INTO articoli_fts(articoli_fts) VALUES ('optimize')")
+    print("🔎 Indice full-text ricostruito.")
+
 
 # Creazione database
 def creazioneDatabase():
-    
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    # Creazione della tabella per i metadati degli articoli
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS meta_articoli (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,       
-        url_cryptopanic VARCHAR(512) UNIQUE,
-        url_articolo VARCHAR(512),
-        data DATETIME,
-        categoria VARCHAR(100)
-    );
-    """)
 
-    # Creazione della tabella per le descrizioni complete (contenuto estratto via web scraping o AI)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS articoli (
-        id INTEGER PRIMARY KEY,
-        titolo VARCHAR(512),
-        articolo_completo_html TEXT,  
-        riassunto_breve TEXT,
-        riassunto_lungo TEXT,
-        categoria VARCHAR(250),
-        peso FLOAT,
-        sentiment FLOAT,
-        FOREIGN KEY (id) REFERENCES articoli_meta(id) ON DELETE CASCADE
-    );
-    """)
+    with transazione() as cursor:
+        # Creazione della tabella per i metadati degli articoli
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS meta_articoli (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,       
+            url_cryptopanic VARCHAR(512) UNIQUE,
+            url_articolo VARCHAR(512),
+            data DATETIME,
+            categoria VARCHAR(100)
+        );
+        """)
+
+        # Creazione della tabella per le descrizioni complete (contenuto estratto via web scraping o AI)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS articoli (
+            id INTEGER PRIMARY KEY,
+            titolo VARCHAR(512),
+            articolo_completo_html TEXT,  
+            riassunto_breve TEXT,
+            riassunto_lungo TEXT,
+            categoria VARCHAR(250),
+            peso FLOAT,
+            sentiment FLOAT,
+            FOREIGN KEY (id) REFERENCES articoli_meta(id) ON DELETE CASCADE
+        );
+        """)
 
-    conn.commit()
-    conn.close()
+    migra_database()
     print(f"✅ Database creato correttamente (se non esiste già) !")
 
 
 ### Gestisce l'inserimento di uno più articoli dei campi : titolo, data, url_cryptopanic
-def salvaArticoliCryptopanic(articoli):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+def salvaArticoliCryptopanic(articoli, dimensione_blocco=500):
+    """
+    Inserisce gli articoli in un'unica transazione. Per ogni blocco di `dimensione_blocco`
+    articoli esegue un solo INSERT multi-riga su meta_articoli che, tramite RETURNING,
+    restituisce gli id delle sole righe nuove (i duplicati vengono ignorati),
+    poi un executemany su articoli con i relativi titoli. Richiede SQLite >= 3.35.
+    """
     nuovi = 0
+    articoli = list(articoli)
+
+    with transazione() as cursor:
+        for inizio in range(0, len(articoli), dimensione_blocco):
+            blocco = articoli[inizio:inizio + dimensione_blocco]
+            titoli = {}
+            for url, _, titolo in blocco:
+                titoli.setdefault(url, titolo)
 
-    for url, data, titolo in articoli:
-        try:
-            cursor.execute("""
-                INSERT OR IGNORE INTO meta_articoli (url_cryptopanic, data)
-                VALUES (?, ?)
-            """, (url, data))
-            id = cursor.lastrowid
+            try:
+                segnaposti = ", ".join(["(?, ?)"] * len(blocco))
+                parametri = [valore for url, data, _ in blocco for valore in (url, data)]
+                inseriti = cursor.execute(f"""
+                    INSERT INTO meta_articoli (url_cryptopanic, data)
+                    VALUES {segnaposti}
+                    ON CONFLICT(url_cryptopanic) DO NOTHING
+                    RETURNING id, url_cryptopanic
+                """, parametri).fetchall()
 
-            if cursor.rowcount > 0:
-                cursor.execute("""
+                cursor.executemany("""
                     INSERT INTO articoli (id, titolo)
                     VALUES (?, ?)
-                """, (id, titolo))
-                nuovi += 1
-        except Exception as e:
-            print(f"❌ Errore salvataggio: {e}")
+                """, [(id, titoli[url]) for id, url in inseriti])
+                nuovi += len(inseriti)
+            except Exception as e:
+                print(f"❌ Errore salvataggio: {e}")
 
-    conn.commit()
-    conn.close()
     print(f"✅ {nuovi} articoli nuovi salvati nel database.")
 
 
+def get_url_cryptopanic_recenti(giorni=3):
+    """
+    Insieme degli url_cryptopanic pubblicati negli ultimi `giorni` giorni rispetto all'articolo
+    più recente del DB: basta per riconoscere il punto del feed da cui in poi è tutto già salvato.
+    """
+    righe = get_connessione().execute("""
+        SELECT url_cryptopanic
+        FROM meta_articoli
+        WHERE data >= (SELECT DATETIME(MAX(data), ?) FROM meta_articoli)
+    """, (f"-{int(giorni)} days",)).fetchall()
+    return {url for (url,) in righe}
+
+
+def get_url_articoli_recenti(limite=10):
+    """Ultimi `limite` url originali validi (campione di pagine per i benchmark del browser)."""
+    righe = get_connessione().execute("""
+        SELECT url_articolo
+        FROM meta_articoli
+        WHERE url_articolo LIKE 'http%'
+        ORDER BY id DESC
+        LIMIT ?
+    """, (limite,)).fetchall()
+    return [url for (url,) in righe]
+
+
 def get_articoli_senza_url_originale():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
+    return list(itera_articoli_senza_url_originale())
+
+def itera_articoli_senza_url_originale(dimensione_pagina=DIMENSIONE_PAGINA, da_id=0):
+    return _itera_a_pagine(f"""
         SELECT id, url_cryptopanic
         FROM meta_articoli
-        WHERE url_articolo IS NULL
-    """)
-    risultati = cursor.fetchall()
-    conn.close()
-    return risultati
+        WHERE {STADI["url"][1]}
+          AND id > :ultimo_id
+        ORDER BY id
+        LIMIT :limite
+    """, dimensione_pagina, da_id)
 
 def aggiorna_url_originale(id_articolo, url_articolo):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE meta_articoli
-        SET url_articolo = ?
-        WHERE id = ?
-    """, (url_articolo, id_articolo))
-    conn.commit()
-    conn.close()
+    aggiorna_url_originali_bulk([(id_articolo, url_articolo)])
+
+def aggiorna_url_originali_bulk(righe):
+    """
+    Aggiornamento in batch degli URL originali. 'righe' è una lista di tuple (id, url_articolo).
+    """
+    if not righe:
+        return
+    with transazione() as cursor:
+        cursor.executemany("""
+            UPDATE meta_articoli
+            SET url_articolo = ?
+            WHERE id = ?
+        """, [(url_articolo, id_articolo) for id_articolo, url_articolo in righe])
 
 
 
 def get_articoli_da_processare_html():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT id, url_articolo
-        FROM meta_articoli
-        WHERE url_articolo IS NOT NULL OR url_articolo!="NESSUN CONTENUTO"
-    """)
-    risultati = cursor.fetchall()
-    conn.close()
-    return risultati
+    """
+    Ritorna [(id, url_articolo)] per gli articoli con URL originale valido
+    e contenuto html non ancora salvato.
+    """
+    return list(itera_articoli_da_processare_html())
 
-def salva_html_articolo(id_articolo, html_pulito):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+def itera_articoli_da_processare_html(dimensione_pagina=DIMENSIONE_PAGINA, da_id=0):
+    return _itera_a_pagine(f"""
+        SELECT a.id, ma.url_articolo
+        FROM articoli AS a
+        JOIN meta_articoli AS ma ON ma.id = a.id
+        WHERE a.{STADI["html"][1]}
+          AND ma.url_articolo IS NOT NULL AND ma.url_articolo != 'NESSUN CONTENUTO'
+          AND a.id > :ultimo_id
+        ORDER BY a.id
+        LIMIT :limite
+    """, dimensione_pagina, da_id)
 
-    cursor.execute("""
-        UPDATE articoli
-        SET articolo_completo_html = ?
-        WHERE id = ?
-    """, (html_pulito, id_articolo))
+def salva_html_articolo(id_articolo, html_pulito):
+    salva_html_articoli_bulk([(id_articolo, html_pulito)])
 
-    conn.commit()
-    conn.close()
+def salva_html_articoli_bulk(righe):
+    """
+    Salvataggio in batch del contenuto html pulito. 'righe' è una lista di tuple (id, html_pulito).
+    """
+    if not righe:
+        return
+    with transazione() as cursor:
+        cursor.executemany("""
+            UPDATE articoli
+            SET articolo_completo_html = ?
+            WHERE id = ?
+        """, [(comprimi_corpo(html_pulito), id_articolo) for id_articolo, html_pulito in righe])
+        _registra_hash(cursor, [(id_articolo, hash_contenuto(html_pulito)) for id_articolo, html_pulito in righe])
 
 
 # Restituisce una lista di articoli (id, contenuto html) che non sono ancora stati riassunti.
 def ottieni_articoli_da_riassumere():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    return list(itera_articoli_da_riassumere())
 
-    cursor.execute("""
-        SELECT id, articolo_completo_html
+# Come ottieni_articoli_da_riassumere, ma legge i contenuti una pagina alla volta.
+def itera_articoli_da_riassumere(dimensione_pagina=DIMENSIONE_PAGINA, da_id=0):
+    return _itera_a_pagine(f"""
+        SELECT id, {colonna_con_archivio("articolo_completo_html")}
         FROM articoli
-        WHERE articolo_completo_html IS NOT NULL AND articolo_completo_html !="NESSUN CONTENUTO"
-          AND (riassunto_breve IS NULL OR riassunto_lungo IS NULL)
-    """)
-
-    articoli = cursor.fetchall()
-    conn.close()
-    return articoli
+        WHERE {STADI["riassunto"][1]}
+          AND {SOLO_CANONICI}
+          AND id > :ultimo_id
+        ORDER BY id
+        LIMIT :limite
+    """, dimensione_pagina, da_id, trasforma=lambda riga: (riga[0], decomprimi_corpo(riga[1])))
 
 # Restituisce una lista di articoli (id, contenuto html) che non sono ancora stati riassunti.
 def salva_riassunto_articolo(id_articolo, riassunto_breve, riassunto_lungo):
     """
     Salva i riassunti breve e lungo per un articolo dato il suo ID.
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    salva_riassunti_bulk([(id_articolo, riassunto_breve, riassunto_lungo)])
 
-    cursor.execute("""
-        UPDATE articoli
-        SET riassunto_breve = ?, riassunto_lungo = ?
-        WHERE id = ?
-    """, (riassunto_breve, riassunto_lungo, id_articolo))
 
-    conn.commit()
-    conn.close()
+def salva_riassunti_bulk(righe):
+    """
+    Salvataggio in batch dei riassunti. 'righe' è una lista di tuple (id, riassunto_breve, riassunto_lungo).
+    """
+    if not righe:
+        return
+    with transazione() as cursor:
+        cursor.executemany("""
+            UPDATE articoli
+            SET riassunto_breve = ?, riassunto_lungo = ?
+            WHERE id = ?
+        """, [(breve, lungo, id_articolo) for id_articolo, breve, lungo in righe])
+        _copia_ai_duplicati(cursor, [id_articolo for id_articolo, _, _ in righe], "riassunto")
 
 
 def reset_riassunti_articolo():
@@ -158,18 +1090,12 @@ def reset_riassunti_articolo():
     Imposta a NULL i valori di riassunto_breve e riassunto_lungo
     per l'articolo corrispondente a id_articolo.
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    try:
+    with transazione() as cursor:
         cursor.execute("""
             UPDATE articoli
             SET riassunto_breve = NULL,
                 riassunto_lungo = NULL
         """)
-        conn.commit()
-    finally:
-        conn.close()
 
 
 
@@ -179,32 +1105,29 @@ def get_articoli_senza_categoria():
     Ritorna lista di tuple (id, riassunto_lungo) per articoli
     con riassunto_lungo non NULL e categoria NULL.
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT id, riassunto_lungo
+    return list(itera_articoli_senza_categoria())
+
+
+def itera_articoli_senza_categoria(dimensione_pagina=DIMENSIONE_PAGINA, da_id=0):
+    """
+    Come get_articoli_senza_categoria, ma restituisce le tuple una alla volta leggendo a pagine.
+    """
+    return _itera_a_pagine(f"""
+        SELECT id, {colonna_con_archivio("riassunto_lungo")}
         FROM articoli
-        WHERE riassunto_lungo IS NOT NULL
-          AND categoria IS NULL
-    """)
-    dati = cursor.fetchall()
-    conn.close()
-    return dati
+        WHERE {STADI["categoria"][1]}
+          AND {SOLO_CANONICI}
+          AND id > :ultimo_id
+        ORDER BY id
+        LIMIT :limite
+    """, dimensione_pagina, da_id)
 
 
 def aggiorna_categoria_articolo(id_articolo: int, categoria: str):
     """
     Aggiorna la categoria di un singolo articolo.
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE articoli
-        SET categoria = ?
-        WHERE id = ?
-    """, (categoria, id_articolo))
-    conn.commit()
-    conn.close()
+    aggiorna_categorie_articoli([(categoria, id_articolo)])
 
 
 def aggiorna_categorie_articoli(updates):
@@ -214,15 +1137,13 @@ def aggiorna_categorie_articoli(updates):
     """
     if not updates:
         return
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.executemany("""
-        UPDATE articoli
-        SET categoria = ?
-        WHERE id = ?
-    """, updates)
-    conn.commit()
-    conn.close()
+    with transazione() as cursor:
+        cursor.executemany("""
+            UPDATE articoli
+            SET categoria = ?
+            WHERE id = ?
+        """, updates)
+        _copia_ai_duplicati(cursor, [id_articolo for _, id_articolo in updates], "categoria")
 
 
 
@@ -233,29 +1154,167 @@ def get_articoli_senza_peso_sentiment_con_categoria():
     Ritorna [(id, titolo, riassunto_lungo)] per articoli con categoria NON NULL
     e peso/sentiment NULL (uno dei due o entrambi).
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT id, COALESCE(titolo, ''), COALESCE(riassunto_lungo, '')
+    return list(itera_articoli_senza_peso_sentiment_con_categoria())
+
+
+def itera_articoli_senza_peso_sentiment_con_categoria(dimensione_pagina=DIMENSIONE_PAGINA, da_id=0):
+    """
+    Come get_articoli_senza_peso_sentiment_con_categoria, ma restituisce le tuple
+    una alla volta leggendo a pagine.
+    """
+    return _itera_a_pagine(f"""
+        SELECT id, COALESCE(titolo, ''), COALESCE({colonna_con_archivio("riassunto_lungo")}, '')
         FROM articoli
-        WHERE categoria IS NOT NULL
-          AND (peso IS NULL OR sentiment IS NULL)
-    """)
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+        WHERE {STADI["peso_sentiment"][1]}
+          AND {SOLO_CANONICI}
+          AND id > :ultimo_id
+        ORDER BY id
+        LIMIT :limite
+    """, dimensione_pagina, da_id)
 
 
 def aggiorna_peso_sentiment_articolo(id_articolo: int, peso: float, sentiment: float):
     """
     Aggiorna entrambi i campi per l'articolo indicato.
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE articoli
-        SET peso = ?, sentiment = ?
-        WHERE id = ?
-    """, (peso, sentiment, id_articolo))
-    conn.commit()
-    conn.close()
+    aggiorna_peso_sentiment_bulk([(id_articolo, peso, sentiment)])
+
+
+def aggiorna_peso_sentiment_bulk(righe):
+    """
+    Aggiornamento in batch. 'righe' è una lista di tuple (id, peso, sentiment).
+    """
+    if not righe:
+        return
+    with transazione() as cursor:
+        cursor.executemany("""
+            UPDATE articoli
+            SET peso = ?, sentiment = ?
+            WHERE id = ?
+        """, [(peso, sentiment, id_articolo) for id_articolo, peso, sentiment in righe])
+        _copia_ai_duplicati(cursor, [id_articolo for id_articolo, _, _ in righe], "peso_sentiment")
+
+
+# === Export: funzioni DB ===
+
+def itera_articoli_modificati(da_versione=0, dimensione_pagina=5000):
+    """
+    Restituisce (versione_riga, id, data, titolo, categoria, peso, sentiment, riassunto_breve,
+    riassunto_lungo) degli articoli creati o modificati dopo `da_versione`, in ordine di versione.
+    """
+    return _itera_a_pagine(f"""
+        SELECT a.versione_riga, a.id, ma.data, a.titolo, a.categoria, a.peso, a.sentiment,
+               {colonna_con_archivio("riassunto_breve", "a")}, {colonna_con_archivio("riassunto_lungo", "a")}
+        FROM articoli AS a
+        JOIN meta_articoli AS ma ON ma.id = a.id
+        WHERE a.versione_riga > :ultimo_id
+        ORDER BY a.versione_riga
+        LIMIT :limite
+    """, dimensione_pagina, da_versione)
+
+
+# === Scaricamento: memoria per dominio ===
+
+def get_metodi_domini():
+    """Restituisce {dominio: (http_ok, http_ko)} con gli esiti dello scaricamento via HTTP."""
+    righe = get_connessione().execute("SELECT dominio, http_ok, http_ko FROM metodi_domini").fetchall()
+    return {dominio: (ok, ko) for dominio, ok, ko in righe}
+
+
+def salva_metodi_domini_bulk(righe):
+    """
+    Salva gli esiti per dominio. 'righe' è una lista di tuple (dominio, http_ok, http_ko)
+    con i contatori aggiornati (sostituiscono quelli presenti).
+    """
+    if not righe:
+        return
+    with transazione() as cursor:
+        cursor.executemany("""
+            INSERT INTO metodi_domini(dominio, http_ok, http_ko, aggiornato_il)
+            VALUES (?, ?, ?, DATETIME('now'))
+            ON CONFLICT(dominio) DO UPDATE SET
+                http_ok = excluded.http_ok,
+                http_ko = excluded.http_ko,
+                aggiornato_il = excluded.aggiornato_il
+        """, righe)
+
+
+# === Archivio HTML grezzo: funzioni DB ===
+
+def salva_html_grezzi_bulk(righe):
+    """
+    Registra l'HTML grezzo archiviato su disco. 'righe' è una lista di tuple (id, url, hash);
+    un nuovo scaricamento dello stesso articolo sostituisce il precedente.
+    """
+    if not righe:
+        return
+    with transazione() as cursor:
+        cursor.executemany("""
+            INSERT INTO html_grezzi(id_articolo, url, hash, salvato_il)
+            VALUES (?, ?, ?, DATETIME('now'))
+            ON CONFLICT(id_articolo) DO UPDATE SET
+                url = excluded.url,
+                hash = excluded.hash,
+                salvato_il = excluded.salvato_il
+        """, righe)
+
+
+def itera_html_grezzi(dimensione_pagina=DIMENSIONE_PAGINA, da_id=0, url=None):
+    """
+    Restituisce (id, hash, contenuto attuale decompresso) degli articoli con HTML grezzo
+    archiviato, esclusi quelli il cui corpo è stato spostato nell'archivio freddo.
+    Con `url` solo gli articoli di quella pagina.
+    """
+    filtro_url = "AND g.url = :url" if url else ""
+    return _itera_a_pagine(f"""
+        SELECT g.id_articolo, g.hash, a.articolo_completo_html
+        FROM html_grezzi AS g
+        JOIN articoli AS a ON a.id = g.id_articolo
+        WHERE a.articolo_completo_html IS NOT '{ARCHIVIATO}'
+          {filtro_url}
+          AND g.id_articolo > :ultimo_id
+        ORDER BY g.id_articolo
+        LIMIT :limite
+    """, dimensione_pagina, da_id, parametri={"url": url},
+        trasforma=lambda riga: (riga[0], riga[1], decomprimi_corpo(riga[2])))
+
+
+def sostituisci_contenuti_bulk(righe):
+    """
+    Sostituisce il contenuto pulito di articoli già elaborati (es. dopo una nuova pulizia
+    dell'HTML grezzo). 'righe' è una lista di tuple (id, html_pulito). Riassunti, categoria,
+    peso e sentiment vengono azzerati così la pipeline li ricalcola sul nuovo contenuto.
+    """
+    if not righe:
+        return
+    ids = [id_articolo for id_articolo, _ in righe]
+    segnaposti = ", ".join("?" * len(ids))
+    colonne = [c for stadio in STADI_SU_CONTENUTO for c in COLONNE_PER_STADIO[stadio]]
+
+    with transazione() as cursor:
+        # Gli articoli che cambiano contenuto non possono più fare da canonico per il vecchio hash:
+        # si eliminano gli hash senza altri articoli (id_canonico è NOT NULL), poi il ruolo passa
+        # all'articolo con id minore tra quelli rimasti con lo stesso hash
+        cursor.execute(f"""
+            DELETE FROM contenuti_canonici
+            WHERE id_canonico IN ({segnaposti})
+              AND NOT EXISTS (
+                  SELECT 1 FROM articoli AS a
+                  WHERE a.hash_contenuto = contenuti_canonici.hash AND a.id NOT IN ({segnaposti})
+              )
+        """, ids + ids)
+        cursor.execute(f"""
+            UPDATE contenuti_canonici
+            SET id_canonico = (
+                SELECT MIN(a.id) FROM articoli AS a
+                WHERE a.hash_contenuto = contenuti_canonici.hash AND a.id NOT IN ({segnaposti})
+            )
+            WHERE id_canonico IN ({segnaposti})
+        """, ids + ids)
+
+        cursor.execute(f"""
+            UPDATE articoli
+            SET {", ".join(f"{c} = NULL" for c in colonne)}
+            WHERE id IN ({segnaposti})
+        """, ids)
+        salva_html_articoli_bulk(righe)
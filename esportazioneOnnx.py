@@ -0,0 +1,169 @@
+"""
+Export del modello SBERT di cleanHtml in ONNX con quantizzazione dinamica int8, e verifica che
+il backend ONNX Runtime prenda le stesse decisioni di PyTorch sulla pulizia delle pagine.
+
+- esporta: salva in cleanHtml.MODELLO_ONNX_DIR l'encoder del modello (ONNX, pesi int8), il
+  tokenizer e sbert_onnx.json. Il mean pooling resta in Python (cleanHtml.SbertOnnx).
+- verifica: esegue la parte SBERT della pulizia (cleanHtml.filtra_paragrafi) con entrambi i
+  backend su un corpus di pagine e confronta le decisioni tieni/scarta. Una decisione diversa è
+  accettata solo se la similarità calcolata da PyTorch è entro `--tolleranza` dalla soglia.
+  Stampa anche i millisecondi per pagina dei due backend. Esce con codice 1 se la verifica fallisce.
+
+Il corpus sono le prime `--campioni` pagine dell'archivio HTML grezzo (archivioHtml), oppure i file passati con --file.
+
+Uso (dalla root del progetto):
+    python esportazioneOnnx.py esporta
+    python esportazioneOnnx.py verifica [--campioni 50] [--tolleranza 0.02] [--file pagina.html ...]
+
+Poi main.py --sbert-onnx (o cleanHtml.imposta_backend("onnx")) usa il modello esportato.
+
+Requisiti:
+    pip install onnx onnxruntime
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import archivioHtml
+import cleanHtml
+import database
+
+OPSET_ONNX = 14
+
+
+def esporta(cartella=cleanHtml.MODELLO_ONNX_DIR):
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    sbert = SentenceTransformer(cleanHtml.MODELLO_SBERT)
+    encoder = sbert[0].auto_model.eval()
+    tokenizer = sbert.tokenizer
+
+    cartella = Path(cartella)
+    cartella.mkdir(parents=True, exist_ok=True)
+    fp32, int8 = cartella / "model_fp32.onnx", cartella / "model_int8.onnx"
+
+    esempio = tokenizer(["Frase di esempio per l'export del modello"], return_tensors="pt")
+    assi = {0: "batch", 1: "token"}
+    with torch.no_grad():
+        torch.onnx.export(
+            encoder, (esempio["input_ids"], esempio["attention_mask"]), str(fp32),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["last_hidden_state", "pooler_output"],
+            dynamic_axes={"input_ids": assi, "attention_mask": assi, "last_hidden_state": assi, "pooler_output": {0: "batch"}},
+            opset_version=OPSET_ONNX,
+        )
+    quantize_dynamic(str(fp32), str(int8), weight_type=QuantType.QInt8)
+
+    tokenizer.save_pretrained(cartella)
+    (cartella / "sbert_onnx.json").write_text(json.dumps({
+        "modello": cleanHtml.MODELLO_SBERT,
+        "file": int8.name,
+        "max_seq_length": sbert.max_seq_length,
+    }, indent=2), encoding="utf-8")
+
+    print(f"📦 Modello ONNX salvato in {cartella}: {fp32.stat().st_size / 2**20:.0f} MB in float32, "
+          f"{int8.stat().st_size / 2**20:.0f} MB in int8.")
+    fp32.unlink()  # serve solo per la quantizzazione
+
+
+def corpus_pagine(campioni=50, file=None):
+    if file:
+        return [Path(f).read_text(encoding="utf-8", errors="replace") for f in file]
+
+    pagine, visti = [], set()
+    for _, hash_html, _ in database.itera_html_grezzi():
+        if hash_html in visti:
+            continue
+        visti.add(hash_html)
+        try:
+            pagine.append(archivioHtml.leggi_html_grezzo(hash_html))
+        except FileNotFoundError:
+            continue
+        if len(pagine) >= campioni:
+            break
+    return pagine
+
+
+def _filtra_con_backend(pagine, backend):
+    """Ritorna (risultati di filtra_paragrafi per ogni pagina, secondi impiegati)."""
+    cleanHtml.imposta_backend(backend)
+    cleanHtml.encode_normalizzati(["Caricamento del modello"])  # caricamento e riscaldamento fuori dalla misura
+
+    inizio = time.perf_counter()
+    risultati = [cleanHtml.filtra_paragrafi(html) for html in pagine]
+    return risultati, time.perf_counter() - inizio
+
+
+def verifica(pagine, tolleranza=0.02):
+    """Confronta le decisioni dei due backend sulle pagine. Ritorna True se sono equivalenti."""
+    torch_ris, torch_s = _filtra_con_backend(pagine, "torch")
+    onnx_ris, onnx_s = _filtra_con_backend(pagine, "onnx")
+
+    confrontate = identiche = decisioni = al_limite = divergenti = 0
+    differenze = []
+    for a, b in zip(torch_ris, onnx_ris):
+        if a is None or b is None:
+            continue  # pagina senza <body>/<h1>: nessuna decisione del modello
+        confrontate += 1
+        identiche += a[0] == b[0]
+
+        # Le decisioni successive dipendono dal paragrafo tenuto in precedenza: si confronta fino alla prima diversa
+        for (sim_a, soglia, tenuto_a), (sim_b, _, tenuto_b) in zip(a[1], b[1]):
+            decisioni += 1
+            if sim_a is not None:
+                differenze.append(abs(sim_a - sim_b))
+            if tenuto_a != tenuto_b:
+                if abs(sim_a - soglia) <= tolleranza:
+                    al_limite += 1
+                else:
+                    divergenti += 1
+                break
+
+    if not confrontate:
+        print("⚠️ Nessuna pagina con <body> e <h1> nel corpus: niente da confrontare.")
+        return False
+
+    print(f"\n📐 ONNX int8 contro PyTorch su {confrontate} pagine ({decisioni} decisioni):")
+    print(f"   pagine con lo stesso testo     {identiche:>8}/{confrontate}")
+    print(f"   decisioni diverse al limite    {al_limite:>8}  (similarità entro ±{tolleranza} dalla soglia)")
+    print(f"   decisioni diverse oltre        {divergenti:>8}")
+    if differenze:
+        print(f"   differenza di similarità       media {sum(differenze) / len(differenze):.4f}, massima {max(differenze):.4f}")
+    print(f"\n⏱️ PyTorch {1000 * torch_s / len(pagine):.1f} ms/pagina, ONNX int8 {1000 * onnx_s / len(pagine):.1f} ms/pagina "
+          f"(x{torch_s / max(onnx_s, 1e-9):.2f})")
+
+    if divergenti:
+        print("❌ Il backend ONNX prende decisioni diverse da PyTorch: non usarlo con queste soglie.")
+        return False
+    print("✅ Backend ONNX equivalente a PyTorch sul corpus.")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export ONNX int8 del modello SBERT di cleanHtml e verifica")
+    comandi = parser.add_subparsers(dest="comando", required=True)
+
+    comandi.add_parser("esporta", help="esporta e quantizza il modello in " + str(cleanHtml.MODELLO_ONNX_DIR))
+
+    p_verifica = comandi.add_parser("verifica", help="confronta decisioni e latenza di PyTorch e ONNX")
+    p_verifica.add_argument("--campioni", type=int, default=50, help="pagine prese dall'archivio HTML")
+    p_verifica.add_argument("--tolleranza", type=float, default=0.02,
+                            help="distanza massima dalla soglia per accettare una decisione diversa")
+    p_verifica.add_argument("--file", nargs="+", help="file HTML da usare al posto dell'archivio")
+
+    args = parser.parse_args()
+    if args.comando == "esporta":
+        esporta()
+    else:
+        if not args.file:
+            database.migra_database()
+        pagine = corpus_pagine(args.campioni, args.file)
+        if not pagine:
+            print("⚠️ Nessuna pagina nell'archivio HTML: passare dei file con --file.")
+            sys.exit(1)
+        sys.exit(0 if verifica(pagine, args.tolleranza) else 1)
@@ -0,0 +1,189 @@
+"""
+Export incrementale degli articoli in file Parquet partizionati per giorno, per le analisi
+e per la costruzione dei dataset (es. regressore peso/sentiment) senza interrogare il DB.
+
+Struttura:
+    export/articoli/giorno=YYYY-MM-DD/part-0.parquet
+    export/articoli/_stato.json          (ultima versione_riga esportata, giorno di ogni articolo)
+
+Ad ogni esecuzione vengono letti dal DB solo gli articoli creati o modificati dopo l'ultimo
+export (colonna articoli.versione_riga, mantenuta da trigger) e vengono riscritte solo le
+partizioni dei giorni in cui cadono: ogni partizione contiene sempre una sola riga per articolo.
+Se la data di un articolo cambia, la riga viene tolta dalla partizione del giorno precedente.
+
+Uso (dalla root del progetto):
+    python esportazioneParquet.py [--completo]
+
+Requisiti:
+    pip install pyarrow
+"""
+
+import argparse
+import json
+import os
+import shutil
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+import database
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow serve solo per l'export, non per la pipeline
+    pa = pc = pq = None
+
+EXPORT_DIR = Path("export") / "articoli"
+FILE_STATO = "_stato.json"
+RIGHE_PER_FLUSH = 20_000  # righe accumulate in memoria prima di riscrivere le partizioni
+
+COLONNE = ("versione_riga", "id", "data", "titolo", "categoria", "peso", "sentiment",
+           "riassunto_breve", "riassunto_lungo")
+
+
+def _schema():
+    return pa.schema([
+        ("versione_riga", pa.int64()),
+        ("id", pa.int64()),
+        ("data", pa.timestamp("s")),
+        ("titolo", pa.string()),
+        ("categoria", pa.string()),
+        ("peso", pa.float64()),
+        ("sentiment", pa.float64()),
+        ("riassunto_breve", pa.string()),
+        ("riassunto_lungo", pa.string()),
+    ])
+
+
+def _leggi_stato(export_dir):
+    percorso = Path(export_dir) / FILE_STATO
+    if not percorso.exists():
+        return {"versione": 0, "giorni": {}}
+    return json.loads(percorso.read_text(encoding="utf-8"))
+
+
+def _salva_stato(export_dir, stato):
+    percorso = Path(export_dir) / FILE_STATO
+    tmp = percorso.with_suffix(".tmp")
+    tmp.write_text(json.dumps(stato), encoding="utf-8")
+    os.replace(tmp, percorso)
+
+
+def _giorno(data):
+    return data[:10] if data else "sconosciuto"
+
+
+def _aggiorna_partizione(export_dir, giorno, righe, rimossi=()):
+    """
+    Unisce le righe nuove a quelle già presenti nella partizione (per id) e la riscrive.
+    Gli id in `rimossi` (articoli passati a un altro giorno) vengono tolti dalla partizione.
+    """
+    cartella = Path(export_dir) / f"giorno={giorno}"
+    percorso = cartella / "part-0.parquet"
+    if not righe and not percorso.exists():
+        return
+
+    colonne = {c: [r[i] for r in righe] for i, c in enumerate(COLONNE)}
+    colonne["data"] = [datetime.fromisoformat(d) if d else None for d in colonne["data"]]
+    nuove = pa.Table.from_pydict(colonne, schema=_schema())
+
+    if percorso.exists():
+        esistenti = pq.read_table(percorso, schema=_schema())
+        togliere = pa.array(nuove["id"].to_pylist() + list(rimossi), pa.int64())
+        sostituite = pc.is_in(esistenti["id"], value_set=togliere)
+        esistenti = esistenti.filter(pc.invert(sostituite))
+        nuove = pa.concat_tables([esistenti, nuove])
+
+    if not nuove.num_rows:
+        shutil.rmtree(cartella)  # tutti gli articoli del giorno sono passati ad altri giorni
+        return
+
+    # Un articolo modificato più volte nello stesso export compare più volte: vince l'ultima versione
+    nuove = nuove.sort_by([("id", "ascending"), ("versione_riga", "descending")])
+    ids = nuove["id"].to_pylist()
+    prime = [i for i, id_articolo in enumerate(ids) if i == 0 or ids[i - 1] != id_articolo]
+    nuove = nuove.take(prime)
+
+    cartella.mkdir(parents=True, exist_ok=True)
+    tmp = cartella / "_part-0.tmp"  # i file che iniziano con "_" vengono ignorati da chi legge il dataset
+    pq.write_table(nuove, tmp, compression="zstd")
+    os.replace(tmp, percorso)
+
+
+def _scrivi_partizioni(export_dir, per_giorno, precedenti, giorni):
+    """
+    Riscrive le partizioni delle righe in `per_giorno`. `precedenti` è {id: giorno in cui l'articolo
+    era esportato prima di queste righe}, `giorni` {id: giorno attuale}: un articolo che ha cambiato
+    giorno va solo nella partizione del giorno attuale e viene tolto da quella precedente.
+    """
+    rimossi = defaultdict(list)
+    for id_articolo, giorno in precedenti.items():
+        if giorno is not None and giorno != giorni[id_articolo]:
+            rimossi[giorno].append(int(id_articolo))
+
+    for giorno in per_giorno.keys() | rimossi.keys():
+        righe = [r for r in per_giorno.get(giorno, ()) if giorni[str(r[1])] == giorno]
+        _aggiorna_partizione(export_dir, giorno, righe, rimossi.get(giorno, ()))
+
+
+def esporta_incrementale(export_dir=EXPORT_DIR, completo=False):
+    """
+    Esporta gli articoli cambiati dall'ultimo export. Con completo=True riparte da zero.
+    Ritorna il numero di righe lette dal DB.
+    """
+    if pa is None:
+        raise RuntimeError("Per l'export Parquet serve il pacchetto 'pyarrow' (pip install pyarrow)")
+
+    export_dir = Path(export_dir)
+    if completo and export_dir.exists():
+        shutil.rmtree(export_dir)
+    export_dir.mkdir(parents=True, exist_ok=True)
+
+    stato = _leggi_stato(export_dir)
+    versione = stato["versione"]
+    giorni = stato["giorni"]  # id (stringa) -> giorno della partizione che contiene l'articolo
+    per_giorno = defaultdict(list)
+    precedenti = {}
+    in_memoria, lette = 0, 0
+
+    for riga in database.itera_articoli_modificati(versione):
+        id_articolo, giorno = str(riga[1]), _giorno(riga[2])
+        precedenti.setdefault(id_articolo, giorni.get(id_articolo))
+        giorni[id_articolo] = giorno
+        per_giorno[giorno].append(riga)
+        versione = riga[0]
+        in_memoria += 1
+        lette += 1
+        if in_memoria >= RIGHE_PER_FLUSH:
+            _scrivi_partizioni(export_dir, per_giorno, precedenti, giorni)
+            per_giorno.clear()
+            precedenti.clear()
+            in_memoria = 0
+
+    _scrivi_partizioni(export_dir, per_giorno, precedenti, giorni)
+
+    # Lo stato si aggiorna solo alla fine: se l'export si interrompe, la prossima esecuzione
+    # rilegge anche le righe già scritte, e l'unione per id le rende innocue.
+    _salva_stato(export_dir, {"versione": versione, "giorni": giorni, "aggiornato_il": datetime.now().isoformat(timespec="seconds")})
+    print(f"📦 Export Parquet: {lette} articoli nuovi o modificati ({export_dir}).")
+    return lette
+
+
+def leggi_export(export_dir=EXPORT_DIR, colonne=None, filtri=None):
+    """
+    Legge l'export come DataFrame pandas (una riga per articolo). `colonne` e `filtri`
+    vengono passati a pyarrow, es. filtri=[("giorno", ">=", "2025-06-01")].
+    """
+    import pandas as pd
+    return pd.read_parquet(export_dir, columns=colonne, filters=filtri)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export incrementale degli articoli in Parquet")
+    parser.add_argument("--completo", action="store_true", help="cancella l'export esistente e riesporta tutto")
+    args = parser.parse_args()
+
+    database.migra_database()
+    esporta_incrementale(completo=args.completo)
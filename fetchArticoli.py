@@ -7,16 +7,27 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
 from webdriver_manager.chrome import ChromeDriverManager
 import database
 import utilities
 import cleanHtml
+import scaricamentoHttp
+import limitatoreDomini
+import archivioHtml
+from limitatoreDomini import limitatore
 import uuid
 import pathlib
 import logging 
 import os
 import subprocess
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import shutil
+import queue
+import threading
+from collections import defaultdict
 
 BASE_URL = "https://cryptopanic.com"
 
@@ -34,12 +45,66 @@ os.environ["WDM_LOG_LEVEL"] = "0"
 logging.getLogger("WDM").setLevel(logging.CRITICAL)
 logging.getLogger("webdriver_manager").setLevel(logging.CRITICAL)
 
-# Setup delle impostazioni di chrome driver e restituisce una istanza
-def setup_chrome_driver(profile_name="selenium-profile"):
+# --- Modalità leggera del browser: servono solo i testi delle pagine ---
+# headless, pageLoadStrategy "eager" e richieste bloccate via CDP per immagini, font, media
+# e domini di pubblicità/tracciamento. Si attiva con BROWSER_LEGGERO = True (main.py --browser-leggero)
+# o passando leggero=True a setup_chrome_driver.
+BROWSER_LEGGERO = False
+
+ESTENSIONI_BLOCCATE = (
+    "png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico", "bmp",   # immagini
+    "woff", "woff2", "ttf", "otf", "eot",                               # font
+    "mp4", "webm", "m3u8", "ts", "mp3", "ogg", "wav", "m4a",            # media
+)
+
+# Domini di pubblicità/tracciamento bloccati di default; si possono aggiungere domini
+# (uno per riga, # per i commenti) nel file BLOCKLIST_PATH
+DOMINI_BLOCCATI = (
+    "doubleclick.net", "googlesyndication.com", "googletagservices.com", "googletagmanager.com",
+    "google-analytics.com", "adservice.google.com", "amazon-adsystem.com", "adnxs.com",
+    "rubiconproject.com", "pubmatic.com", "openx.net", "criteo.com", "criteo.net",
+    "taboola.com", "outbrain.com", "teads.tv", "smartadserver.com", "moatads.com",
+    "scorecardresearch.com", "quantserve.com", "chartbeat.com", "hotjar.com",
+    "facebook.net", "onesignal.com", "seedtag.com", "adform.net",
+)
+BLOCKLIST_PATH = "blocklist_browser.txt"
+
+
+# Pattern per Network.setBlockedURLs (tipi di risorsa + domini della blocklist)
+def url_bloccati_browser_leggero():
+    domini = list(DOMINI_BLOCCATI)
+    if os.path.exists(BLOCKLIST_PATH):
+        with open(BLOCKLIST_PATH, encoding="utf-8") as f:
+            domini += [riga.split("#")[0].strip() for riga in f if riga.split("#")[0].strip()]
+
+    pattern = []
+    for estensione in ESTENSIONI_BLOCCATE:
+        pattern += [f"*.{estensione}", f"*.{estensione}?*"]
+    pattern += [f"*://*.{dominio}/*" for dominio in domini]
+    pattern += [f"*://{dominio}/*" for dominio in domini]
+    return pattern
+
+
+# Applica i blocchi della modalità leggera alla scheda corrente (Network.setBlockedURLs vale per
+# la sola scheda: va ripetuto quando si passa a una scheda nuova)
+def applica_modalita_leggera(driver):
+    if getattr(driver, "leggero", False):
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": url_bloccati_browser_leggero()})
+
+
+# Setup delle impostazioni di chrome driver e restituisce una istanza.
+# leggero=None usa BROWSER_LEGGERO; log_rete=True registra gli eventi di rete (serve a benchmarkBrowser.py)
+def setup_chrome_driver(profile_name="selenium-profile", leggero=None, log_rete=False):
+    if leggero is None:
+        leggero = BROWSER_LEGGERO
     chrome_options = Options()
 
-    # Headed per affidabilità (ok così). Attiva headless solo se ti serve:
-    # chrome_options.add_argument("--headless=new")
+    # Headed per affidabilità (ok così). In modalità leggera si usa headless:
+    if leggero:
+        chrome_options.add_argument("--headless=new")
+        # driver.get ritorna a DOM pronto, senza aspettare immagini e iframe
+        chrome_options.page_load_strategy = "eager"
 
     # Stabilità in ambienti container/CI
     chrome_options.add_argument("--no-sandbox")
@@ -63,13 +128,17 @@ def setup_chrome_driver(profile_name="selenium-profile"):
         "Chrome/126.0.0.0 Safari/537.36"
     )
     chrome_options.add_argument("--lang=it-IT")
-    chrome_options.add_experimental_option(
-        "prefs", {
-            "intl.accept_languages": "it-IT,it",
-            "profile.default_content_setting_values.cookies": 1,
-            "profile.block_third_party_cookies": False,
-        }
-    )
+    prefs = {
+        "intl.accept_languages": "it-IT,it",
+        "profile.default_content_setting_values.cookies": 1,
+        "profile.block_third_party_cookies": False,
+    }
+    if leggero:
+        prefs["profile.managed_default_content_settings.images"] = 2
+    chrome_options.add_experimental_option("prefs", prefs)
+
+    if log_rete:
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
     chrome_options.add_argument("--window-size=1366,768")
 
     # Profilo persistente (evita re-verifiche umane)
@@ -85,83 +154,184 @@ def setup_chrome_driver(profile_name="selenium-profile"):
 
     driver = webdriver.Chrome(service=service, options=chrome_options)
     driver.set_page_load_timeout(60)
+    driver.leggero = leggero
+    applica_modalita_leggera(driver)
     return driver
 
 
-# Esegue lo scroll e clicca 'Load more' fino a quando non ci sono più nuovi articoli.
-def scroll_news_page(driver, scroll_container, max_pause=2):
+# Restituisce [numero di righe nel feed, [[href, datetime, titolo], ...] delle righe dalla posizione
+# arguments[0] in poi]. Sono righe del feed solo i div con class esattamente "news-row news-row-link"
+# (le sponsorizzate hanno classi in più); titolo in <span class="title-text"><span>, data in <time datetime>.
+# Le righe nuove vengono sempre aggiunte in fondo.
+JS_NUOVE_RIGHE_FEED = """
+const righe = Array.from(document.querySelectorAll('div.news-row'))
+    .filter(div => div.getAttribute('class') === 'news-row news-row-link');
+const nuove = righe.slice(arguments[0]).map(div => {
+    const a = div.querySelector('a[href]');
+    const t = div.querySelector('time[datetime]');
+    const titolo = div.querySelector('span.title-text span');
+    return [a ? a.getAttribute('href') : null,
+            t ? t.getAttribute('datetime') : null,
+            titolo ? titolo.textContent.trim() : null];
+});
+return [righe.length, nuove];
+"""
+
+# Numero di righe del feed (stesso filtro di JS_NUOVE_RIGHE_FEED)
+JS_CONTA_RIGHE_FEED = """
+return Array.from(document.querySelectorAll('div.news-row'))
+    .filter(div => div.getAttribute('class') === 'news-row news-row-link').length;
+"""
+
+XPATH_LOAD_MORE = "//button[contains(@class, 'btn-outline-primary')]"
+
+
+# Costruisce la tupla (url, data, titolo) a partire da href relativo, datetime e titolo di una riga del feed
+def _articolo_da_riga(relative_url, published_at_raw, title):
+    # Costruisce l'URL completo assoluto partendo dal path relativo
+    full_url = BASE_URL + relative_url
+
+    # Converte la stringa datetime in oggetto datetime Python (formato SQL compatibile)
+    published_at = utilities.convert_to_sql_datetime(published_at_raw) if published_at_raw else None
+
+    return (full_url, published_at, title)
+
+
+# --- Attese: condizioni di pagina pronta al posto delle pause fisse ---
+# Ogni attesa ha un limite massimo e la sua durata viene registrata per passo in `tempi_attesa`,
+# così si vede quanta latenza serve davvero ad ogni step (stampa_tempi_attesa()).
+tempi_attesa = defaultdict(list)  # passo -> [(secondi, scaduta), ...]
+_lock_attese = threading.Lock()
+
+
+def attendi(driver, passo, condizione, timeout, intervallo=0.1):
+    """
+    Aspetta che `condizione(driver)` sia vera per al massimo `timeout` secondi e registra
+    quanto ha atteso. Ritorna il valore della condizione, oppure None se il tempo scade.
+    """
+    inizio = time.perf_counter()
+    scaduta = False
+    try:
+        return WebDriverWait(
+            driver, timeout, poll_frequency=intervallo, ignored_exceptions=(StaleElementReferenceException,)
+        ).until(condizione)
+    except TimeoutException:
+        scaduta = True
+        return None
+    finally:
+        with _lock_attese:
+            tempi_attesa[passo].append((time.perf_counter() - inizio, scaduta))
+
 
-    articles_seen = 0 # Conta il numero di articoli rilevati all'inizio
+class ReteInattiva:
+    """
+    Condizione per attendi(): vera quando il documento è caricato ('complete') e da `quiete`
+    secondi il browser non ha avviato nuove richieste (conteggio delle Resource Timing).
+    """
+
+    JS = """
+    performance.setResourceTimingBufferSize(10000);
+    return [document.readyState, performance.getEntriesByType('resource').length];
+    """
+
+    def __init__(self, quiete=0.5):
+        self.quiete = quiete
+        self._risorse = None
+        self._da = None
+
+    def __call__(self, driver):
+        stato, risorse = driver.execute_script(self.JS)
+        ora = time.monotonic()
+        if stato != "complete" or risorse != self._risorse:
+            self._risorse, self._da = risorse, ora
+            return False
+        return ora - self._da >= self.quiete
+
+
+def attendi_pagina_caricata(driver, passo, timeout):
+    """Aspetta documento caricato e rete inattiva (per le pagine che completano il contenuto via JavaScript)."""
+    return attendi(driver, passo, ReteInattiva(), timeout)
+
+
+def url_fuori_da_cryptopanic(driver):
+    return scaricamentoHttp.dominio(driver.current_url) not in ("", "cryptopanic.com")
+
+
+def rispetta_intervallo_dominio(url):
+    """Rate limiting: attende un gettone del token bucket del dominio (vedi limitatoreDomini)."""
+    limitatore.attendi_turno(scaricamentoHttp.dominio(url))
+
+
+def stampa_tempi_attesa(azzera=True):
+    with _lock_attese:
+        righe = sorted(tempi_attesa.items())
+        if azzera:
+            tempi_attesa.clear()
+    if not righe:
+        return
+    print(f"\n⏱️ Attese per passo:\n{'passo':<28}{'n':>6}{'media s':>10}{'max s':>9}{'scadute':>9}")
+    for passo, durate in righe:
+        secondi = [d for d, _ in durate]
+        print(f"{passo:<28}{len(durate):>6}{sum(secondi) / len(secondi):>10.2f}{max(secondi):>9.2f}"
+              f"{sum(1 for _, scaduta in durate if scaduta):>9}")
+
+
+# Esegue lo scroll e clicca 'Load more' fino a quando non ci sono più nuovi articoli.
+# Ad ogni scroll legge dal browser solo le righe aggiunte in fondo al feed (niente page_source)
+# e restituisce la lista di tuple (url, data, titolo) di tutti gli articoli caricati.
+# Se viene passato `url_noti` (url_cryptopanic già salvati) si ferma appena uno scroll
+# carica solo articoli già presenti nel DB (modalità incrementale).
+# `max_pause` è il tempo massimo di attesa di nuove righe dopo ogni scroll / click su 'Load more'.
+def scroll_news_page(driver, scroll_container, max_pause=5, url_noti=None):
+
+    articoli = [] # Articoli accumulati man mano che il feed si allunga
+    articles_seen = 0 # Conta il numero di righe del feed già lette
     scroll_attempts = 0 # Conta quanti scroll sono stati eseguiti
 
     while True:
-        # Scrolla in fondo al contenitore che mostra le notizie
+        # Scrolla in fondo al contenitore che mostra le notizie e aspetta che arrivino nuove righe
+        # (o che compaia il bottone "Load more")
         driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", scroll_container)
-        time.sleep(max_pause)
+        attendi(driver, "feed: scroll", lambda d: (
+            d.execute_script(JS_CONTA_RIGHE_FEED) > articles_seen
+            or any(b.is_displayed() for b in d.find_elements(By.XPATH, XPATH_LOAD_MORE))
+        ), max_pause)
 
         # Tenta di cliccare il bottone "Load more" se è visibile
         try:
-            load_more_button = driver.find_element(By.XPATH, "//button[contains(@class, 'btn-outline-primary')]")
+            load_more_button = driver.find_element(By.XPATH, XPATH_LOAD_MORE)
             if load_more_button.is_displayed():
                 print("🔽 Bottone 'Load more' trovato. Clicco...")
+                righe_prima = driver.execute_script(JS_CONTA_RIGHE_FEED)
                 driver.execute_script("arguments[0].click();", load_more_button)
-                time.sleep(max_pause)
+                attendi(driver, "feed: load more", lambda d: d.execute_script(JS_CONTA_RIGHE_FEED) > righe_prima, max_pause)
         except:
             # Se il bottone non esiste o non è cliccabile, ignora e continua
             pass
 
-        # Analizza il DOM aggiornato per contare gli articoli
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        news_divs = soup.find_all("div", class_="news-row news-row-link")
-        current_count = len(news_divs)
+        # Legge dal DOM solo le righe aggiunte dopo l'ultima già vista
+        current_count, nuove_righe = driver.execute_script(JS_NUOVE_RIGHE_FEED, articles_seen)
+        nuovi_articoli = [_articolo_da_riga(*riga) for riga in nuove_righe if riga[0]]
+        articoli.extend(nuovi_articoli)
 
         print(f"🌀 Scroll {scroll_attempts+1}: {current_count} articoli trovati finora")
 
         # Interrompe se non sono stati aggiunti nuovi articoli rispetto all’iterazione precedente
-        if current_count == articles_seen:
+        if current_count <= articles_seen:
             print("🛑 Scroll terminato: nessun nuovo contenuto caricato.")
             break
 
+        # Modalità incrementale: se gli articoli appena caricati sono tutti già nel DB, quelli
+        # successivi (più vecchi) lo sono anche loro
+        if url_noti is not None:
+            if nuovi_articoli and all(url in url_noti for url, _, _ in nuovi_articoli):
+                print("🛑 Scroll terminato: gli ultimi articoli caricati sono già tutti nel database.")
+                break
+
         # Aggiorna il numero di articoli rilevati e passa allo scroll successivo
         articles_seen = current_count
         scroll_attempts += 1
 
-
-# Estrae lista di tuple (url, data, titolo) da un oggetto BeautifulSoup.
-def estrai_articoli_da_soup(soup):
-
-    articoli = [] # Lista finale che conterrà tutte le tuple (url, data, titolo)
-
-    # Cicla su tutti i blocchi di notizie standard (esclude quelle sponsorizzate)
-    for div in soup.find_all("div", class_="news-row news-row-link"):
-        # Cerca il link interno all'articolo (sul sito di CryptoPanic)
-        a_tag = div.find("a", href=True)
-        # Cerca il tag <time> con attributo datetime (per la data dell'articolo)
-        time_tag = div.find("time", datetime=True)
-        # Estrae il titolo dell'articolo dal blocco <span class="title-text"><span>Testo</span></span>
-        title_span = div.find("span", class_="title-text")
-        title = None
-
-        if title_span:
-            inner_span = title_span.find("span") # Il vero titolo è nel figlio interno
-            if inner_span:
-                title = inner_span.get_text(strip=True) # Rimuove spazi extra e newline
-
-        if not a_tag:
-            continue # Se non c'è un link, ignora questo blocco
-
-        # Costruisce l'URL completo assoluto partendo dal path relativo
-        relative_url = a_tag["href"]
-        full_url = BASE_URL + relative_url
-
-        # Converte la stringa datetime in oggetto datetime Python (formato SQL compatibile)
-        published_at_raw = time_tag["datetime"] if time_tag else None
-        published_at = utilities.convert_to_sql_datetime(published_at_raw) if published_at_raw else None
-
-        # Aggiunge il risultato come tupla alla lista
-        articoli.append((full_url, published_at, title))
-    
-    # Restituisce tutti gli articoli trovati
     return articoli
 
 
@@ -174,31 +344,44 @@ def seleziona_feed_italiano(driver):
         )
         driver.execute_script("arguments[0].scrollIntoView(true);", region_menu)
         webdriver.ActionChains(driver).move_to_element(region_menu).perform()
-        time.sleep(1.5)
+        attendi(driver, "feed: menu lingue", EC.presence_of_element_located((By.XPATH, "//li[contains(text(), 'Italiano')]")), 5)
+
+        # Prima riga del feed attuale: quando il filtro cambia, il feed viene ricaricato e la riga sparisce
+        righe_feed = driver.find_elements(By.CLASS_NAME, "news-row")
+        filtro_cambiato = False
 
         # 2. Trova e deseleziona "English" se è attivo
         english_li = driver.find_elements(By.XPATH, "//li[contains(text(), 'English') and contains(@class, 'active')]")
         if english_li:
             print("🌐 Deseleziono English...")
             driver.execute_script("arguments[0].click();", english_li[0])
-            time.sleep(1)
+            attendi(driver, "feed: deseleziona English", lambda d: not d.find_elements(
+                By.XPATH, "//li[contains(text(), 'English') and contains(@class, 'active')]"), 5)
+            filtro_cambiato = True
 
         # 3. Assicura che "Italiano" sia attivo
         italiano_li = driver.find_elements(By.XPATH, "//li[contains(text(), 'Italiano') and not(contains(@class, 'active'))]")
         if italiano_li:
             print("🇮🇹 Attivo Italiano...")
             driver.execute_script("arguments[0].click();", italiano_li[0])
-            time.sleep(1)
+            attendi(driver, "feed: attiva Italiano", lambda d: d.find_elements(
+                By.XPATH, "//li[contains(text(), 'Italiano') and contains(@class, 'active')]"), 5)
+            filtro_cambiato = True
+
+        # Aspetta che il feed sia ricaricato con i soli articoli in italiano (ex pausa fissa di 3 secondi)
+        if filtro_cambiato and righe_feed:
+            attendi(driver, "feed: ricarica filtrata", EC.staleness_of(righe_feed[0]), 5)
 
         print("✅ Feed impostato su solo Italiano.")
     except Exception as e:
         print(f"❌ Errore nel filtrare solo italiano: {e}")
-    
-    # Aspetta tre secondi in modo tale che saranno caricati solo gli articoli in italiano
-    time.sleep(3)
 
 ### FUNZIONE PRINCIPALE: estrae gli articoli da cryptopanic: titolo, url_cryptopanic e data
-def fetch_articoli_cryptopanic():
+# Con incrementale=True lo scroll si ferma al primo blocco di articoli già salvati invece di
+# caricare tutto il feed (con il DB vuoto il comportamento è lo stesso della modalità completa).
+def fetch_articoli_cryptopanic(incrementale=True):
+
+    url_noti = database.get_url_cryptopanic_recenti() if incrementale else None
 
     # Inizializza chrome driver
     driver = setup_chrome_driver()
@@ -220,17 +403,13 @@ def fetch_articoli_cryptopanic():
         EC.presence_of_element_located((By.CLASS_NAME, "news-container"))
     )
 
-    # Scrolla fino in fondo alla pagina per caricare tutti gli articoli
-    scroll_news_page(driver, scroll_container)
-
-    # Analizza l'HTML della pagina interamente scrollata con BeautifulSoup
-    soup = BeautifulSoup(driver.page_source, "html.parser")
+    # Scrolla fino in fondo alla pagina e raccoglie man mano i dati utili (titolo, url_cryptopanic, data)
+    # dei singoli articoli, senza riconvertire in soup l'intera pagina
+    articoli = scroll_news_page(driver, scroll_container, url_noti=url_noti)
 
     # Chiude il browser per liberare risorse
     driver.quit()
-
-    # Estrae tutti i dati utili (titolo, url_cryptopanic, data) dai singoli articoli presenti nella pagina
-    articoli = estrai_articoli_da_soup(soup)
+    stampa_tempi_attesa()
 
     # Ordina gli articoli dal più vecchio al più recente per un inserimento cronologico
     articoli_ordinati = utilities.ordina_articoli_per_data(articoli)
@@ -242,31 +421,32 @@ def fetch_articoli_cryptopanic():
 # Estrae il l'url originale degli articoli da cryptopanic
 def scraping_url_articoli(driver, cryptopanic_url):
     try:
+        rispetta_intervallo_dominio(cryptopanic_url)  # Rate limiting
         driver.get(cryptopanic_url)
 
         # Aspetta che il titolo sia cliccabile
-        WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, "h1.post-title span.text"))
-        )
+        if not attendi(driver, "url: titolo cliccabile",
+                       EC.element_to_be_clickable((By.CSS_SELECTOR, "h1.post-title span.text")), 10):
+            raise TimeoutException("titolo non cliccabile")
 
         article_title = driver.find_element(By.CSS_SELECTOR, "h1.post-title span.text")
         print(f"Titolo cliccabile trovato: {article_title.text}")
 
+        # Salva la finestra attuale
+        original_window = driver.current_window_handle
+
         # Clicca con scroll
         driver.execute_script("arguments[0].scrollIntoView(true);", article_title)
-        time.sleep(0.5)
         driver.execute_script("arguments[0].click();", article_title)
-        time.sleep(2)
-
-        # Salva la finestra attuale
-        original_window = driver.current_window_handle
 
         # Se si apre una nuova scheda, passaci
-        WebDriverWait(driver, 5).until(lambda d: len(d.window_handles) > 1)
+        attendi(driver, "url: nuova scheda", lambda d: len(d.window_handles) > 1, 7)
         new_tabs = [tab for tab in driver.window_handles if tab != original_window]
         if new_tabs:
             driver.switch_to.window(new_tabs[0])
-            time.sleep(5)
+            applica_modalita_leggera(driver)
+            # Aspetta il redirect verso il sito originale
+            attendi(driver, "url: redirect", url_fuori_da_cryptopanic, 10)
             article_url = driver.current_url
             driver.close()  # ❌ chiude la scheda appena aperta
             driver.switch_to.window(original_window)  # 🔁 torna alla scheda principale
@@ -279,8 +459,38 @@ def scraping_url_articoli(driver, cryptopanic_url):
         return None
 
 
+# Endpoint di CryptoPanic che reindirizza al sito originale (lo stesso chiamato dal click sul titolo)
+URL_CLICK = BASE_URL + "/news/click/{id_post}/"
+RISOLUTORI_HTTP = 16  # richieste di risoluzione degli URL in parallelo
+
+# Risolve l'url originale seguendo via HTTP il redirect di CryptoPanic, senza browser né click.
+# Ritorna None se non ci si riesce (es. verifica anti-bot): in quel caso si ripiega sul click con Chrome.
+def risolvi_url_originale(url_cryptopanic):
+    trovato = re.search(r"/news/(\d+)/", url_cryptopanic)
+    if not trovato:
+        return None
+
+    url_articolo = scaricamentoHttp.risolvi_redirect(URL_CLICK.format(id_post=trovato.group(1)))
+    if url_articolo and scaricamentoHttp.dominio(url_articolo) != "cryptopanic.com":
+        return url_articolo
+    return None
+
+
+# Risolve in parallelo gli url originali di una lista di (id, url_cryptopanic).
+# Genera (id, url_cryptopanic, url_originale o None) man mano che le risposte arrivano.
+def risolvi_url_originali(articoli, workers=RISOLUTORI_HTTP):
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futuri = {
+            pool.submit(risolvi_url_originale, url_cryptopanic): (id_articolo, url_cryptopanic)
+            for id_articolo, url_cryptopanic in articoli
+        }
+        for futuro in as_completed(futuri):
+            id_articolo, url_cryptopanic = futuri[futuro]
+            yield id_articolo, url_cryptopanic, futuro.result()
+
+
 ### FUNZIONE PRINCIPALE: estrarre gli url originali degli articoli
-def fetch_url_articoli():
+def fetch_url_articoli(dimensione_flush=database.DIMENSIONE_FLUSH):
     articoli = database.get_articoli_senza_url_originale()
 
     if not articoli:
@@ -289,25 +499,35 @@ def fetch_url_articoli():
 
     print(f"🔍 Trovati {len(articoli)} articoli da elaborare.")
 
-    # 🔄 Istanzia una sola volta il ChromeDriver
-    driver = setup_chrome_driver()
-
-    for id_articolo, url_cryptopanic in articoli:
-        print(f"\n🔄 Elaborazione articolo ID {id_articolo}...")
-
-        url_articolo = scraping_url_articoli(driver, url_cryptopanic)
-
-        if url_articolo:
-            print(f"✅ URL originale trovato: {url_articolo}")
-            database.aggiorna_url_originale(id_articolo, url_articolo)
-        else:
-            print(f"⚠️ Nessun URL trovato per {url_cryptopanic}")
-            database.aggiorna_url_originale(id_articolo, "NESSUN CONTENUTO")
-
-        time.sleep(1.5)  # Rate limiting
+    # Chrome serve solo per gli articoli il cui url non si risolve via HTTP
+    driver = None
+    risolti_http = 0
+
+    # Gli URL vengono scritti nel DB a blocchi di `dimensione_flush` articoli
+    with database.BufferScrittura(database.aggiorna_url_originali_bulk, dimensione_flush) as buffer_url:
+        for id_articolo, url_cryptopanic, url_articolo in risolvi_url_originali(articoli):
+            print(f"\n🔄 Elaborazione articolo ID {id_articolo}...")
+
+            if url_articolo:
+                risolti_http += 1
+            else:
+                if driver is None:
+                    driver = setup_chrome_driver()
+                url_articolo = scraping_url_articoli(driver, url_cryptopanic)
+
+            if url_articolo:
+                print(f"✅ URL originale trovato: {url_articolo}")
+                buffer_url.aggiungi(id_articolo, url_articolo)
+            else:
+                print(f"⚠️ Nessun URL trovato per {url_cryptopanic}")
+                buffer_url.aggiungi(id_articolo, "NESSUN CONTENUTO")
 
     # 🔚 Chiudi il driver solo alla fine
-    driver.quit()
+    if driver is not None:
+        driver.quit()
+    print(f"🔗 URL risolti via HTTP senza browser: {risolti_http}/{len(articoli)}")
+    stampa_tempi_attesa()
+    limitatore.stampa_statistiche()
 
 
 # Estrae il contenuto html di ogni articolo della pagina dato un URL
@@ -317,12 +537,11 @@ def fetch_html_articolo(driver, url):
     Usa un'istanza esistente di Chrome WebDriver.
     """
     try:
+        rispetta_intervallo_dominio(url)
         driver.get(url)
 
-        # Attende che il contenuto principale della pagina venga caricato
-        WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.TAG_NAME, "body"))
-        )
+        # Attende che la pagina sia caricata e che le richieste JavaScript si siano fermate
+        attendi_pagina_caricata(driver, "html: pagina caricata", 15)
 
         return driver.page_source
 
@@ -333,109 +552,352 @@ def fetch_html_articolo(driver, url):
 
 
 ### FUNZIONE PRINCIPALE: Estrae e salva l'HTML pulito degli articoli il cui contenuto non è ancora stato processato.
-def fetch_contenuto_html_articoli():
+def fetch_contenuto_html_articoli(dimensione_flush=database.DIMENSIONE_FLUSH):
 
     articoli = database.get_articoli_da_processare_html()
     if not articoli:
         print("✅ Tutti gli articoli sono già stati elaborati.")
         return
 
-    # Inizializza una sola istanza di Chrome WebDriver
-    driver = setup_chrome_driver()
+    # Chrome viene avviato solo al primo articolo che non si riesce a scaricare via HTTP
+    driver = None
+    memoria = scaricamentoHttp.MemoriaDomini()
 
+    def html_con_selenium(url):
+        nonlocal driver
+        if driver is None:
+            driver = setup_chrome_driver()
+        return fetch_html_articolo(driver, url)
+
+    # Gli articoli vengono elaborati alternando i domini: mentre un sito è in pausa per il
+    # rate limiting si passa agli articoli di un altro
+    coda = limitatoreDomini.CodaPerDominio(limitatore)
     for id_articolo, url_articolo in articoli:
-        print(f"\n🔍 Elaborazione articolo ID {id_articolo}")
+        coda.aggiungi(scaricamentoHttp.dominio(url_articolo), (id_articolo, url_articolo))
+    coda.chiudi()
+
+    # I contenuti vengono scritti nel DB a blocchi di `dimensione_flush` articoli; l'HTML grezzo
+    # va nell'archivio su disco (archivioHtml) per poterlo ripulire in seguito senza riscaricarlo
+    buffer_html = database.BufferScrittura(database.salva_html_articoli_bulk, dimensione_flush)
+    buffer_grezzi = database.BufferScrittura(database.salva_html_grezzi_bulk, dimensione_flush)
+
+    with buffer_html, buffer_grezzi:
+        while (articolo := coda.prossimo()) is not None:
+            id_articolo, url_articolo = articolo
+            print(f"\n🔍 Elaborazione articolo ID {id_articolo}")
+
+            contenuto_html_pulito, html_grezzo = scaricamentoHttp.contenuto_articolo(
+                url_articolo, memoria,
+                lambda html: cleanHtml.clean_html_content(html, dominio=scaricamentoHttp.dominio(url_articolo)),
+                lambda: html_con_selenium(url_articolo),
+            )
+            hash_html = archivioHtml.salva_html_grezzo(html_grezzo)
+            if hash_html:
+                buffer_grezzi.aggiungi(id_articolo, url_articolo, hash_html)
+
+            if not contenuto_html_pulito or not contenuto_html_pulito.strip():
+                print("⚠️ HTML non disponibile o pulito vuoto.")
+                buffer_html.aggiungi(id_articolo, "NESSUN CONTENUTO")
+                continue
+
+            buffer_html.aggiungi(id_articolo, contenuto_html_pulito)
+            print(f"✅ Contenuto pronto per il salvataggio, articolo ID {id_articolo}")
+
+    # Chiude il WebDriver (se è stato avviato) dopo aver processato tutti gli articoli
+    if driver is not None:
+        driver.quit()
+    memoria.salva()
+    memoria.stampa_riepilogo()
+    stampa_tempi_attesa()
+    limitatore.stampa_statistiche()
+    cleanHtml.cache_embedding.stampa_statistiche()
+    print("\n🏁 Completato il salvataggio di tutti gli HTML.")
 
-        contenuto_html = fetch_html_articolo(driver, url_articolo)
-        if not contenuto_html:
-            print("⚠️ HTML non disponibile.")
-            database.salva_html_articolo(id_articolo, "NESSUN CONTENUTO")
-            continue
 
-        contenuto_html_pulito = cleanHtml.clean_html_content(contenuto_html)
-        if not contenuto_html_pulito.strip():
-            print("⚠️ HTML pulito vuoto o non valido.")
-            database.salva_html_articolo(id_articolo, "NESSUN CONTENUTO")
-            continue
+# Numero di browser in parallelo di default: ogni Chrome occupa circa un core e qualche centinaio di MB
+NUM_WORKERS = max(1, min(4, (os.cpu_count() or 2) // 2))
+# Processi che puliscono l'HTML (SBERT + langdetect) mentre i browser scaricano le pagine successive
+NUM_PULITORI = cleanHtml.NUM_PROCESSI_PULIZIA
+# Pagine scaricate in attesa di pulizia: quando la coda è piena i browser si fermano (backpressure)
+PAGINE_IN_ATTESA = 8
+RISULTATI_IN_ATTESA = 100  # contenuti puliti in attesa del writer
+
+# Profilo Chrome del worker `indice`: il worker 0 usa il profilo principale, gli altri una copia
+# (Chrome non permette a due istanze di usare la stessa --user-data-dir)
+def profilo_worker(indice, profile_name="selenium-profile"):
+    if indice == 0:
+        return profile_name
+
+    nome = f"{profile_name}-worker{indice}"
+    base_dir = pathlib.Path.home() / ".selenium"
+    profilo_base, profilo_worker_dir = base_dir / profile_name, base_dir / nome
+
+    # Copiato solo la prima volta, così i cookie delle verifiche già superate valgono anche per i worker
+    if profilo_base.exists() and not profilo_worker_dir.exists():
+        shutil.copytree(
+            profilo_base, profilo_worker_dir,
+            ignore=shutil.ignore_patterns("Singleton*", "*.lock", "lockfile"),
+            ignore_dangling_symlinks=True,
+        )
+    return nome
 
-        try:
-            database.salva_html_articolo(id_articolo, contenuto_html_pulito)
-            print(f"✅ Contenuto salvato per articolo ID {id_articolo}")
-        except Exception as e:
-            print(f"❌ Errore nel salvataggio DB per articolo ID {id_articolo}: {e}")
-            database.salva_html_articolo(id_articolo, "NESSUN CONTENUTO")
 
-        time.sleep(1.5)  # Rate limiting
+class StatisticheStadio:
+    """
+    Contatori di uno stadio della pipeline, condivisi dai suoi thread: pezzi elaborati, tempo
+    di lavoro, tempo fermo ad aspettare lo stadio a monte e tempo bloccato sulla coda piena
+    dello stadio a valle (backpressure).
+    """
 
-    # Chiude il WebDriver dopo aver processato tutti gli articoli
-    driver.quit()
-    print("\n🏁 Completato il salvataggio di tutti gli HTML.")
+    def __init__(self, nome, thread):
+        self.nome = nome
+        self.thread = thread
+        self.pezzi = 0
+        self.occupato = 0.0
+        self.attesa_ingresso = 0.0
+        self.attesa_uscita = 0.0
+        self.coda_max = 0  # profondità massima raggiunta dalla coda in uscita
+        self._lock = threading.Lock()
+
+    def prendi(self, prossimo):
+        """Chiama `prossimo()` (get della coda in ingresso) misurando l'attesa."""
+        inizio = time.monotonic()
+        elemento = prossimo()
+        with self._lock:
+            self.attesa_ingresso += time.monotonic() - inizio
+        return elemento
+
+    def metti(self, coda_uscita, elemento):
+        inizio = time.monotonic()
+        coda_uscita.put(elemento)
+        with self._lock:
+            self.attesa_uscita += time.monotonic() - inizio
+            self.coda_max = max(self.coda_max, coda_uscita.qsize())
+
+    def registra(self, secondi):
+        with self._lock:
+            self.pezzi += 1
+            self.occupato += secondi
+
+
+def stampa_statistiche_stadi(stadi, durata):
+    print(f"\n📈 Pipeline completata in {durata:.1f} s:")
+    print(f"{'stadio':<12}{'thread':>7}{'pezzi':>8}{'pezzi/s':>9}{'utilizzo':>10}{'attesa input s':>16}{'bloccato s':>12}{'coda max':>10}")
+    for stadio in stadi:
+        utilizzo = stadio.occupato / max(durata * stadio.thread, 1e-9)
+        print(f"{stadio.nome:<12}{stadio.thread:>7}{stadio.pezzi:>8}{stadio.pezzi / max(durata, 1e-9):>9.2f}"
+              f"{utilizzo:>10.0%}{stadio.attesa_ingresso:>16.1f}{stadio.attesa_uscita:>12.1f}{stadio.coda_max:>10}")
+
+
+# Stadio 1 (browser): prende articoli dalla coda per dominio e ne scarica l'HTML grezzo, via HTTP se il dominio
+# lo consente, altrimenti con il proprio Chrome (avviato solo quando serve). Non pulisce l'HTML: lo passa ai
+# pulitori in `coda_html`, e si blocca se la coda è piena.
+# Un lavoro è (id, url_cryptopanic, url_originale o None, già provato via HTTP, hash dell'HTML HTTP o None).
+def _worker_download_html(indice, coda, coda_html, memoria, statistiche):
+    driver = None
+    lavoro = None
+
+    def get_driver():
+        nonlocal driver
+        if driver is None:
+            driver = setup_chrome_driver(profilo_worker(indice))
+        return driver
 
+    try:
+        while (lavoro := statistiche.prendi(coda.prossimo)) is not None:
+            inizio = time.monotonic()
+            id_articolo, url_cryptopanic, url_articolo, provato_http, hash_http = lavoro
+
+            if not url_articolo:
+                # Url non risolto via HTTP: click sul titolo con Chrome, poi l'articolo torna in coda
+                # sotto il dominio del sito originale (rispettandone il rate limiting)
+                print(f"\n🔄 [worker {indice}] Articolo ID {id_articolo}: url originale con il click")
+                url_articolo = scraping_url_articoli(get_driver(), url_cryptopanic)
+                if url_articolo:
+                    coda.aggiungi(scaricamentoHttp.dominio(url_articolo),
+                                  (id_articolo, url_cryptopanic, url_articolo, False, None))
+                    coda.completato()
+                    statistiche.registra(time.monotonic() - inizio)
+                    continue
+                html, metodo = None, "selenium"
+
+            elif not provato_http and memoria.usa_http(scaricamentoHttp.dominio(url_articolo)):
+                print(f"\n🔄 [worker {indice}] Articolo ID {id_articolo} via HTTP")
+                html, metodo = scaricamentoHttp.scarica_html(url_articolo), "http"
+
+            else:
+                print(f"\n🔄 [worker {indice}] Articolo ID {id_articolo} con Chrome")
+                html, metodo = fetch_html_articolo(get_driver(), url_articolo), "selenium"
+
+            statistiche.registra(time.monotonic() - inizio)
+            statistiche.metti(coda_html, ((id_articolo, url_cryptopanic, url_articolo, provato_http, hash_http), html, metodo))
+            lavoro = None
 
-### Funzione per estrarre l'url originale e il contenuto degli articoli
-def fetch_url_e_html_articoli():
+    except Exception as e:
+        print(f"❌ [worker {indice}] Errore del browser, il worker si ferma: {e}")
+        if lavoro is not None:
+            coda.completato()  # l'articolo resta senza url nel DB e verrà ripreso al prossimo avvio
+    finally:
+        if driver is not None:
+            driver.quit()
+
+
+# Stadio 2 (pulizia): fa pulire l'HTML scaricato da un processo del pool di pulizia e archivia quello grezzo.
+# Se l'HTML ottenuto via HTTP non dà contenuto, l'articolo torna nella coda dei browser per un tentativo con Chrome.
+# I risultati (id, url, contenuto pulito, hash dell'HTML grezzo) vanno al writer in `coda_risultati`.
+# Se il pool di pulizia si rompe (un processo è morto) la pipeline si ferma: l'errore va in `errori`
+# e viene rilanciato dal writer, invece di salvare "NESSUN CONTENUTO" per ogni articolo rimasto.
+def _worker_pulizia_html(coda, coda_html, coda_risultati, memoria, statistiche, pool_pulizia, errori):
+    try:
+        while (pagina := statistiche.prendi(coda_html.get)) is not None:
+            inizio = time.monotonic()
+            (id_articolo, url_cryptopanic, url_articolo, provato_http, hash_http), html, metodo = pagina
+
+            # Ogni pagina presa va segnata come completata (finally), qualunque cosa succeda:
+            # altrimenti la coda non si chiude e browser e writer restano in attesa per sempre
+            try:
+                if coda.interrotta:
+                    continue  # pipeline interrotta: l'articolo resta da elaborare nel DB
+
+                try:
+                    contenuto_html_pulito = cleanHtml.pulisci_nel_pool(
+                        pool_pulizia, html, dominio=scaricamentoHttp.dominio(url_articolo)
+                    ) if html else ""
+                except BrokenProcessPool as e:
+                    scartati = coda.interrompi()
+                    if scartati is not None:  # solo il primo pulitore che se ne accorge
+                        print(f"❌ Pool di pulizia non più utilizzabile, la pipeline si ferma: {e}")
+                        print(f"⚠️ {scartati} articoli in coda non elaborati: verranno ripresi al prossimo avvio.")
+                        errori.append(e)
+                    continue
+                except Exception as e:
+                    print(f"❌ Errore durante la pulizia dell'articolo ID {id_articolo}: {e}")
+                    contenuto_html_pulito = ""
+                hash_html = archivioHtml.salva_html_grezzo(html) or hash_http
+
+                if contenuto_html_pulito.strip():
+                    memoria.registra_contenuto(scaricamentoHttp.dominio(url_articolo), metodo, provato_http)
+                elif metodo == "http":
+                    coda.aggiungi(scaricamentoHttp.dominio(url_articolo),
+                                  (id_articolo, url_cryptopanic, url_articolo, True, hash_html))
+                    continue
+
+                statistiche.metti(coda_risultati, (id_articolo, url_articolo, contenuto_html_pulito, hash_html))
+            except Exception as e:
+                # Errore fuori dalla pulizia (archivio HTML, DB...): l'articolo resta da elaborare, il pulitore continua
+                print(f"❌ Errore durante l'elaborazione dell'articolo ID {id_articolo}, verrà ripreso al prossimo avvio: {e}")
+            finally:
+                statistiche.registra(time.monotonic() - inizio)
+                coda.completato()
+    finally:
+        coda_risultati.put(None)  # segnala al writer che questo pulitore ha finito
+
+
+### Funzione per estrarre l'url originale e il contenuto degli articoli.
+# Pipeline a stadi collegati da code limitate: risoluzione degli url via HTTP -> browser (download HTML)
+# -> pulitori (clean_html_content in un pool di processi, vedi cleanHtml.crea_pool_pulizia) -> un solo
+# writer nel DB. Mentre i pulitori lavorano sulla CPU i browser scaricano già le pagine successive.
+def fetch_url_e_html_articoli(dimensione_flush=database.DIMENSIONE_FLUSH, workers=NUM_WORKERS, pulitori=NUM_PULITORI):
     articoli = database.get_articoli_senza_url_originale()
     if not articoli:
         print("✅ Nessun articolo da aggiornare.")
         return
 
-    print(f"🔍 Trovati {len(articoli)} articoli da processare (URL + contenuto).")
-
-    driver = setup_chrome_driver()
-
-    for id_articolo, url_cryptopanic in articoli:
-        print(f"\n🔄 Articolo ID {id_articolo}")
-
-        # Step 1: Accedi a CryptoPanic e clicca sul titolo
-        url_articolo = None
-        contenuto_html_pulito = None
-
-        try:
-            driver.get(url_cryptopanic)
-
-            WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, "h1.post-title span.text"))
-            )
-            article_title = driver.find_element(By.CSS_SELECTOR, "h1.post-title span.text")
-            driver.execute_script("arguments[0].scrollIntoView(true);", article_title)
-            driver.execute_script("arguments[0].click();", article_title)
-            time.sleep(2)
-
-            original_window = driver.current_window_handle
-            WebDriverWait(driver, 5).until(lambda d: len(d.window_handles) > 1)
-            new_tab = [w for w in driver.window_handles if w != original_window][0]
-
-            driver.switch_to.window(new_tab)
-            time.sleep(10) #3 precedentemente
-
-            url_articolo = driver.current_url
-            contenuto_html = driver.page_source
-
-            contenuto_html_pulito = cleanHtml.clean_html_content(contenuto_html)
-
-            driver.close()
-            driver.switch_to.window(original_window)
-
-        except Exception as e:
-            print(f"❌ Errore durante l'accesso o estrazione.")
-
-        # Step 2: Salvataggio dei dati
-        if url_articolo:
-            database.aggiorna_url_originale(id_articolo, url_articolo)
-        else:
-            url_articolo = "NESSUN CONTENUTO"
-            database.aggiorna_url_originale(id_articolo, url_articolo)
-
-        if contenuto_html_pulito and contenuto_html_pulito.strip():
-            database.salva_html_articolo(id_articolo, contenuto_html_pulito)
-            print(f"✅ Contenuto HTML salvato")
-        else:
-            database.salva_html_articolo(id_articolo, "NESSUN CONTENUTO")
-            print("⚠️ Contenuto HTML mancante o vuoto")
-
-        time.sleep(1.5)
-
-    driver.quit()
+    workers = max(1, min(workers, len(articoli)))
+    pulitori = max(1, min(pulitori, len(articoli)))
+    print(f"🔍 Trovati {len(articoli)} articoli da processare (URL + contenuto) "
+          f"con {workers} browser e {pulitori} pulitori in parallelo.")
+
+    # Coda per dominio (url originale, o cryptopanic.com se va risolto cliccando): i worker alternano
+    # i siti e il rate limiting per dominio non blocca gli articoli degli altri siti
+    coda = limitatoreDomini.CodaPerDominio(limitatore)
+    coda_html = queue.Queue(maxsize=PAGINE_IN_ATTESA)
+    coda_risultati = queue.Queue(maxsize=RISULTATI_IN_ATTESA)
+    memoria = scaricamentoHttp.MemoriaDomini()
+
+    stadi = (
+        StatisticheStadio("download", workers),
+        StatisticheStadio("pulizia", pulitori),
+        StatisticheStadio("scrittura", 1),
+    )
+    stat_download, stat_pulizia, stat_scrittura = stadi
+    inizio = time.monotonic()
+
+    # Un processo per pulitore: ogni thread di pulizia attende il proprio processo, che carica SBERT una volta sola.
+    # crea_pool_pulizia aspetta il caricamento del modello: se fallisce ci si ferma qui, prima di aprire i browser
+    pool_pulizia = cleanHtml.crea_pool_pulizia(pulitori)
+    errori_pulizia = []
+
+    browser = [
+        threading.Thread(target=_worker_download_html, args=(i, coda, coda_html, memoria, stat_download), daemon=True)
+        for i in range(workers)
+    ]
+    thread_pulizia = [
+        threading.Thread(target=_worker_pulizia_html,
+                         args=(coda, coda_html, coda_risultati, memoria, stat_pulizia, pool_pulizia, errori_pulizia),
+                         daemon=True)
+        for _ in range(pulitori)
+    ]
+    for t in browser + thread_pulizia:
+        t.start()
+
+    # Gli url originali si risolvono via HTTP in parallelo e ogni articolo passa ai browser appena pronto.
+    # La coda si chiude quando ogni articolo è arrivato al writer (anche dopo un secondo tentativo con Chrome)
+    def produci():
+        for id_articolo, url_cryptopanic, url_articolo in risolvi_url_originali(articoli):
+            dominio = scaricamentoHttp.dominio(url_articolo) if url_articolo else "cryptopanic.com"
+            coda.aggiungi(dominio, (id_articolo, url_cryptopanic, url_articolo, False, None))
+        coda.chiudi_a_fine_lavori()
+
+    # Finiti i browser, i pulitori smaltiscono le pagine rimaste e si fermano
+    def chiudi_pulizia():
+        for t in browser:
+            t.join()
+        for _ in thread_pulizia:
+            coda_html.put(None)
+
+    threading.Thread(target=produci, daemon=True).start()
+    threading.Thread(target=chiudi_pulizia, daemon=True).start()
+
+    # Unico writer: questo thread raccoglie i risultati dei pulitori e li scrive nel DB
+    # a blocchi di `dimensione_flush` articoli
+    buffer_url = database.BufferScrittura(database.aggiorna_url_originali_bulk, dimensione_flush)
+    buffer_html = database.BufferScrittura(database.salva_html_articoli_bulk, dimensione_flush)
+    buffer_grezzi = database.BufferScrittura(database.salva_html_grezzi_bulk, dimensione_flush)
+
+    with buffer_url, buffer_html, buffer_grezzi:
+        attivi = pulitori
+        while attivi:
+            risultato = stat_scrittura.prendi(coda_risultati.get)
+            if risultato is None:
+                attivi -= 1
+                continue
+
+            inizio_scrittura = time.monotonic()
+            id_articolo, url_articolo, contenuto_html_pulito, hash_html = risultato
+
+            buffer_url.aggiungi(id_articolo, url_articolo or "NESSUN CONTENUTO")
+            if hash_html:
+                buffer_grezzi.aggiungi(id_articolo, url_articolo, hash_html)
+
+            if contenuto_html_pulito and contenuto_html_pulito.strip():
+                buffer_html.aggiungi(id_articolo, contenuto_html_pulito)
+                print(f"✅ Contenuto HTML pronto per il salvataggio (ID {id_articolo})")
+            else:
+                buffer_html.aggiungi(id_articolo, "NESSUN CONTENUTO")
+                print(f"⚠️ Contenuto HTML mancante o vuoto (ID {id_articolo})")
+            stat_scrittura.registra(time.monotonic() - inizio_scrittura)
+
+    pool_pulizia.shutdown()
+    memoria.salva()
+    memoria.stampa_riepilogo()
+    stampa_tempi_attesa()
+    limitatore.stampa_statistiche()
+    cleanHtml.cache_embedding.stampa_statistiche()
+    stampa_statistiche_stadi(stadi, time.monotonic() - inizio)
+    if errori_pulizia:
+        raise errori_pulizia[0]
+    non_elaborati = coda.lavori_in_attesa()
+    if non_elaborati:
+        print(f"⚠️ {non_elaborati} articoli non elaborati (browser non disponibili): verranno ripresi al prossimo avvio.")
     print("🏁 Operazione completata per tutti gli articoli.")
-
-
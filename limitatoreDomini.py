@@ -0,0 +1,222 @@
+"""
+Limite di richieste per dominio (token bucket) e coda di lavori che alterna i domini.
+
+- LimitatoreDomini: un token bucket per dominio; ogni richiesta in uscita (HTTP o pagina
+  caricata da Chrome) chiama attendi_turno(dominio) e aspetta solo se quel dominio ha
+  esaurito i gettoni. Domini diversi non si rallentano a vicenda.
+- CodaPerDominio: coda dei lavori raggruppati per dominio; prossimo() restituisce a turno un
+  lavoro di un dominio che ha un gettone disponibile, così i worker restano occupati con altri
+  siti mentre un dominio è in pausa.
+
+Entrambi registrano per dominio attese e profondità della coda (stampa_statistiche()).
+"""
+
+import threading
+import time
+from collections import defaultdict, deque
+
+# (richieste al secondo, raffica massima) per dominio
+VELOCITA_DEFAULT = (1 / 1.5, 2)
+VELOCITA_DOMINI = {
+    "cryptopanic.com": (2.0, 5),
+}
+
+
+class TokenBucket:
+    def __init__(self, velocita, capacita):
+        self.velocita = velocita
+        self.capacita = capacita
+        self.gettoni = capacita
+        self.aggiornato = time.monotonic()
+
+    def _ricarica(self, ora):
+        self.gettoni = min(self.capacita, self.gettoni + (ora - self.aggiornato) * self.velocita)
+        self.aggiornato = ora
+
+    def pronto_tra(self, ora):
+        """Secondi che mancano al prossimo gettone (0 se disponibile subito)."""
+        self._ricarica(ora)
+        return 0.0 if self.gettoni >= 1 else (1 - self.gettoni) / self.velocita
+
+    def prendi(self, ora):
+        """Prende un gettone se c'è; altrimenti ritorna i secondi da attendere."""
+        attesa = self.pronto_tra(ora)
+        if attesa == 0.0:
+            self.gettoni -= 1
+        return attesa
+
+
+class LimitatoreDomini:
+    def __init__(self, velocita_default=VELOCITA_DEFAULT, velocita_domini=None):
+        self.velocita_default = velocita_default
+        self.velocita_domini = dict(VELOCITA_DOMINI if velocita_domini is None else velocita_domini)
+        self._bucket = {}
+        self._lock = threading.Lock()
+        self.richieste = defaultdict(int)
+        self.attese = defaultdict(list)   # dominio -> secondi attesi prima di ogni richiesta
+        self.coda_max = defaultdict(int)  # dominio -> profondità massima della coda dei lavori
+        self.attese_coda = defaultdict(list)  # dominio -> secondi passati in coda da ogni lavoro
+
+    def _bucket_di(self, dominio):
+        bucket = self._bucket.get(dominio)
+        if bucket is None:
+            bucket = self._bucket[dominio] = TokenBucket(*self.velocita_domini.get(dominio, self.velocita_default))
+        return bucket
+
+    def pronto_tra(self, dominio):
+        with self._lock:
+            return self._bucket_di(dominio).pronto_tra(time.monotonic())
+
+    def attendi_turno(self, dominio):
+        """Blocca finché il dominio non ha un gettone, poi lo consuma."""
+        inizio = time.monotonic()
+        while True:
+            with self._lock:
+                attesa = self._bucket_di(dominio).prendi(time.monotonic())
+                if attesa == 0.0:
+                    self.richieste[dominio] += 1
+                    self.attese[dominio].append(time.monotonic() - inizio)
+                    return
+            time.sleep(attesa)
+
+    def registra_coda(self, dominio, profondita):
+        with self._lock:
+            self.coda_max[dominio] = max(self.coda_max[dominio], profondita)
+
+    def registra_attesa_coda(self, dominio, secondi):
+        with self._lock:
+            self.attese_coda[dominio].append(secondi)
+
+    def azzera_statistiche(self):
+        with self._lock:
+            self.richieste.clear()
+            self.attese.clear()
+            self.coda_max.clear()
+            self.attese_coda.clear()
+
+    def stampa_statistiche(self, max_domini=15, azzera=True):
+        with self._lock:
+            righe = [
+                (dominio, self.richieste[dominio], sum(attese), max(attese), self.coda_max.get(dominio, 0),
+                 self.attese_coda.get(dominio, []))
+                for dominio, attese in self.attese.items()
+            ]
+        if azzera:
+            self.azzera_statistiche()
+        if not righe:
+            return
+
+        righe.sort(key=lambda r: r[2], reverse=True)
+        print(f"\n🚦 Richieste per dominio (primi {min(max_domini, len(righe))} per attesa totale):")
+        print(f"{'dominio':<32}{'richieste':>10}{'attesa s':>10}{'media s':>9}{'max s':>8}{'coda max':>10}{'in coda s':>11}")
+        for dominio, n, totale, massimo, coda_max, in_coda in righe[:max_domini]:
+            media_coda = f"{sum(in_coda) / len(in_coda):>11.1f}" if in_coda else f"{'-':>11}"
+            print(f"{dominio[:30]:<32}{n:>10}{totale:>10.1f}{totale / n:>9.2f}{massimo:>8.2f}{coda_max:>10}{media_coda}")
+
+
+class CodaPerDominio:
+    """
+    Coda di lavori per dominio condivisa tra thread. aggiungi() dai produttori, prossimo()
+    dai worker; dopo chiudi() prossimo() ritorna None quando la coda si svuota.
+    prossimo() non consuma gettoni: li consuma la richiesta vera e propria (attendi_turno).
+
+    Se un lavoro può tornare in coda dopo essere stato preso (es. riprovato con il browser),
+    chi lo porta a termine chiama completato() e il produttore chiudi_a_fine_lavori() al posto
+    di chiudi(): la coda si chiude solo quando tutti i lavori aggiunti sono stati completati.
+
+    interrompi() scarta i lavori in attesa e chiude la coda subito (errore che ferma la pipeline).
+    """
+
+    def __init__(self, limitatore):
+        self.limitatore = limitatore
+        self._code = {}
+        self._turni = deque()  # domini con lavori in attesa, in ordine di turno
+        self._chiusa = False
+        self._in_corso = 0  # lavori aggiunti e non ancora completati (vedi completato())
+        self._chiudi_a_fine_lavori = False
+        self.interrotta = False
+        self._cond = threading.Condition()
+
+    def aggiungi(self, dominio, lavoro):
+        with self._cond:
+            if self.interrotta:
+                return
+            if dominio not in self._code:
+                self._code[dominio] = deque()
+                self._turni.append(dominio)
+            self._code[dominio].append((lavoro, time.monotonic()))
+            self._in_corso += 1
+            self.limitatore.registra_coda(dominio, len(self._code[dominio]))
+            self._cond.notify()
+
+    def chiudi(self):
+        with self._cond:
+            self._chiusa = True
+            self._cond.notify_all()
+
+    def interrompi(self):
+        """Scarta i lavori in attesa e chiude la coda. Ritorna il numero di lavori scartati (None se era già interrotta)."""
+        with self._cond:
+            if self.interrotta:
+                return None
+            scartati = sum(len(coda) for coda in self._code.values())
+            self._code.clear()
+            self._turni.clear()
+            self.interrotta = self._chiusa = True
+            self._cond.notify_all()
+            return scartati
+
+    def completato(self):
+        with self._cond:
+            self._in_corso -= 1
+            if self._chiudi_a_fine_lavori and self._in_corso == 0:
+                self._chiusa = True
+                self._cond.notify_all()
+
+    def chiudi_a_fine_lavori(self):
+        with self._cond:
+            self._chiudi_a_fine_lavori = True
+            if self._in_corso == 0:
+                self._chiusa = True
+                self._cond.notify_all()
+
+    def profondita(self):
+        """{dominio: lavori in attesa}"""
+        with self._cond:
+            return {dominio: len(coda) for dominio, coda in self._code.items()}
+
+    def lavori_in_attesa(self):
+        with self._cond:
+            return sum(len(coda) for coda in self._code.values())
+
+    def prossimo(self):
+        """
+        Restituisce il prossimo lavoro (a turno tra i domini con un gettone disponibile),
+        aspettando se tutti i domini in coda sono in pausa. None se la coda è chiusa e vuota.
+        """
+        with self._cond:
+            while True:
+                if not self._turni and self._chiusa:
+                    return None
+
+                attesa_minima = None
+                for _ in range(len(self._turni)):
+                    dominio = self._turni[0]
+                    self._turni.rotate(-1)
+                    attesa = self.limitatore.pronto_tra(dominio)
+                    if attesa == 0.0:
+                        lavoro, accodato_il = self._code[dominio].popleft()
+                        self.limitatore.registra_attesa_coda(dominio, time.monotonic() - accodato_il)
+                        if not self._code[dominio]:
+                            del self._code[dominio]
+                            self._turni.remove(dominio)
+                        return lavoro
+                    attesa_minima = attesa if attesa_minima is None else min(attesa_minima, attesa)
+
+                # Nessun dominio pronto (o coda vuota): si riprova quando si libera un gettone
+                # o quando arriva un nuovo lavoro
+                self._cond.wait(timeout=attesa_minima)
+
+
+# Limitatore condiviso da tutte le richieste in uscita del processo
+limitatore = LimitatoreDomini()
@@ -1,27 +1,60 @@
+import argparse
 import database
 import fetchArticoli
+import cleanHtml
 import riassunti.riassuntoArticoli as riassuntoArticoli
 import classificazione.classificazioneNB
 import regressionePesoSentiment.regressorePesoSentiment2 as PesoSentiment
 
-#NON AVVIARE - funzione per creare il database se non esiste - da eseguire una sola volta
-#database.creazioneDatabase()
-
-#Recuperiamo nuovi articoli: Titolo, data e url_cryptopanic
-fetchArticoli.fetch_articoli_cryptopanic()
-
-#Recuperiamo url originale degli articoli e il contenuto dell' articolo
-fetchArticoli.fetch_url_e_html_articoli()
-
-### Aggiungere quy query per impostare riassunto_breve e riassunto_lungo a NESSUN CONTENUTO se articolo_html contiene NESSU CONTENUTO
-
-#Generiamo e salvaiamo il riassutno lungo e corto per gli articoli
-riassuntoArticoli.riassunto_articoli()
-
-#Classifichiamo in Categoria gli articoli senza categoria (nuovi)
-classificazione.classificazioneNB.classificaNewArticle()
-
-# Generiamo Peso e Sentiment per gli articoli 
-PesoSentiment.genera_peso_sentiment_per_articoli()
-
-#database.reset_riassunti_articolo()
+# La pulizia dell'HTML gira in processi avviati con "spawn", che reimportano questo file:
+# la pipeline va eseguita solo quando main.py è lanciato direttamente
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline di raccolta e analisi degli articoli")
+    parser.add_argument("--workers", type=int, default=fetchArticoli.NUM_WORKERS,
+                        help="numero di browser Chrome in parallelo per recuperare url e contenuti")
+    parser.add_argument("--pulitori", type=int, default=fetchArticoli.NUM_PULITORI,
+                        help="numero di processi che puliscono l'HTML mentre i browser scaricano le pagine successive")
+    parser.add_argument("--feed-completo", action="store_true",
+                        help="scorre tutto il feed di CryptoPanic invece di fermarsi agli articoli già salvati")
+    parser.add_argument("--browser-leggero", action="store_true",
+                        help="Chrome headless senza immagini, font, media e pubblicità (vedi benchmarkBrowser.py)")
+    parser.add_argument("--sbert-onnx", action="store_true",
+                        help="pulizia dell'HTML con il modello SBERT ONNX int8 (vedi esportazioneOnnx.py)")
+    parser.add_argument("--cache-embedding", action="store_true",
+                        help="salva su disco la cache degli embedding dei paragrafi e la riusa all'avvio successivo")
+    args = parser.parse_args()
+    fetchArticoli.BROWSER_LEGGERO = args.browser_leggero
+    if args.sbert_onnx:
+        cleanHtml.imposta_backend("onnx")
+
+    #NON AVVIARE - funzione per creare il database se non esiste - da eseguire una sola volta
+    #database.creazioneDatabase()
+
+    #Aggiorna lo schema dei DB esistenti (indici delle code di lavoro, ecc.) - non fa nulla se già aggiornato
+    database.migra_database()
+
+    #Recuperiamo nuovi articoli: Titolo, data e url_cryptopanic
+    fetchArticoli.fetch_articoli_cryptopanic(incrementale=not args.feed_completo)
+
+    #Recuperiamo url originale degli articoli e il contenuto dell' articolo
+    if args.cache_embedding:
+        cleanHtml.cache_embedding.carica()
+    fetchArticoli.fetch_url_e_html_articoli(workers=args.workers, pulitori=args.pulitori)
+    if args.cache_embedding:
+        cleanHtml.cache_embedding.salva()
+
+    ### Aggiungere quy query per impostare riassunto_breve e riassunto_lungo a NESSUN CONTENUTO se articolo_html contiene NESSU CONTENUTO
+
+    #Generiamo e salvaiamo il riassutno lungo e corto per gli articoli
+    riassuntoArticoli.riassunto_articoli()
+
+    #Classifichiamo in Categoria gli articoli senza categoria (nuovi)
+    classificazione.classificazioneNB.classificaNewArticle()
+
+    # Generiamo Peso e Sentiment per gli articoli 
+    PesoSentiment.genera_peso_sentiment_per_articoli()
+
+    #Riepilogo del lavoro evitato grazie agli articoli duplicati (stesso contenuto da più fonti)
+    database.stampa_lavoro_risparmiato()
+
+    #database.reset_riassunti_articolo()
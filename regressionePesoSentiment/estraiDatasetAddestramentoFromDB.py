@@ -1,29 +1,24 @@
-import sqlite3
-import pandas as pd
+import database
+import esportazioneParquet
 
-# Connessione al database SQLite
-db_path = 'crypto_news.db'  # Cambia il nome se necessario
-conn = sqlite3.connect(db_path)
-cursor = conn.cursor()
+# Aggiorna l'export Parquet degli articoli: dal DB vengono lette solo le righe
+# nuove o modificate dall'ultimo export (python -m regressionePesoSentiment.estraiDatasetAddestramentoFromDB)
+database.migra_database()
+esportazioneParquet.esporta_incrementale()
 
-# Query SQL
-query = """
-SELECT id, titolo, riassunto_lungo, peso, sentiment
-FROM articoli
-WHERE titolo IS NOT NULL
-  AND (riassunto_lungo IS NOT NULL AND riassunto_lungo != 'NESSUN CONTENUTO')
-  AND peso IS NOT NULL
-  AND sentiment IS NOT NULL;
-"""
+# Lettura delle sole colonne necessarie dai file Parquet (al posto della query sul DB)
+df = esportazioneParquet.leggi_export(colonne=['id', 'titolo', 'riassunto_lungo', 'peso', 'sentiment'])
 
-# Esecuzione della query e caricamento in un DataFrame
-df = pd.read_sql_query(query, conn)
+# Stessi filtri della query SQL originale
+df = df[
+    df['titolo'].notna()
+    & df['riassunto_lungo'].notna() & (df['riassunto_lungo'] != 'NESSUN CONTENUTO')
+    & df['peso'].notna()
+    & df['sentiment'].notna()
+].sort_values('id').reset_index(drop=True)
 
 # Mostra le prime righe (facoltativo)
 print(df.head())
 
 # Salva il dataset in CSV (facoltativo)
 df.to_csv('regressionePesoSentiment/datasetAddestramento.csv', index=False, sep='|')
-
-# Chiusura della connessione
-conn.close()
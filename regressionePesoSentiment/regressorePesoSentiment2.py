@@ -1,30 +1,41 @@
-import torch
-import joblib
-import numpy as np
-from transformers import AutoModel  # usa il tokenizer salvato su pickle
-from sklearn.linear_model import Ridge  # solo per typing; i modelli li carichi da pickle
 import database
 
 # === CONFIG ===
 MODEL_NAME = "Musixmatch/umberto-commoncrawl-cased-v1"
-DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 MAX_LENGTH = 512
 
-# === 1. Carica tokenizer e modelli addestrati ===
-tokenizer = joblib.load("regressionePesoSentiment/tokenizer.pkl")
-model_peso = joblib.load("regressionePesoSentiment/model_peso.pkl")
-model_sentiment = joblib.load("regressionePesoSentiment/model_sentiment.pkl")
+# === 1. Tokenizer, modelli addestrati e transformer HF ===
+# Caricati una sola volta, al primo articolo da predire: importare il modulo (es. da main.py) non
+# carica torch né UmBERTo, e se non ci sono articoli da aggiornare non vengono caricati affatto.
+_modelli = None
 
-# Carica una volta il modello HF (NON dentro la funzione, per evitare costi ripetuti)
-_transformer = AutoModel.from_pretrained(MODEL_NAME).to(DEVICE)
-_transformer.eval()
+def carica_modelli():
+    """Ritorna (tokenizer, model_peso, model_sentiment, transformer, device), caricandoli al primo utilizzo."""
+    global _modelli
+    if _modelli is None:
+        import joblib
+        import torch
+        from transformers import AutoModel  # usa il tokenizer salvato su pickle
+
+        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        tokenizer = joblib.load("regressionePesoSentiment/tokenizer.pkl")
+        model_peso = joblib.load("regressionePesoSentiment/model_peso.pkl")
+        model_sentiment = joblib.load("regressionePesoSentiment/model_sentiment.pkl")
+
+        transformer = AutoModel.from_pretrained(MODEL_NAME).to(device)
+        transformer.eval()
+        _modelli = (tokenizer, model_peso, model_sentiment, transformer, device)
+    return _modelli
 
 # === 2. Funzione per estrarre embedding (mean pooling) ===
-def estrai_embedding(text: str) -> np.ndarray:
+def estrai_embedding(text: str) -> "np.ndarray":
     """
     Ritorna un vettore numpy (1, hidden_size) con mean pooling sui token validi.
     Gestisce anche testi vuoti/placeholder senza andare in errore.
     """
+    import torch
+    tokenizer, _, _, transformer, device = carica_modelli()
+
     # fallback per testi "vuoti"
     if not isinstance(text, str):
         text = ""
@@ -47,11 +58,11 @@ def estrai_embedding(text: str) -> np.ndarray:
             return_tensors="pt"
         )
 
-    input_ids = inputs["input_ids"].to(DEVICE)
-    attention_mask = inputs["attention_mask"].to(DEVICE)
+    input_ids = inputs["input_ids"].to(device)
+    attention_mask = inputs["attention_mask"].to(device)
 
     with torch.no_grad():
-        output = _transformer(input_ids=input_ids, attention_mask=attention_mask)
+        output = transformer(input_ids=input_ids, attention_mask=attention_mask)
         last_hidden = output.last_hidden_state  # (1, seq_len, hidden)
 
         mask = attention_mask.unsqueeze(-1).expand(last_hidden.size()).float()
@@ -65,6 +76,7 @@ def estrai_embedding(text: str) -> np.ndarray:
 # === 3. Predizione singola (peso, sentiment) ===
 def predici_peso_sentiment(titolo: str, riassunto_lungo: str):
     testo_completo = (titolo or "").strip() + " " + (riassunto_lungo or "").strip()
+    _, model_peso, model_sentiment, _, _ = carica_modelli()
     embedding = estrai_embedding(testo_completo)
     peso_pred = float(model_peso.predict(embedding)[0])
     sentiment_pred = float(model_sentiment.predict(embedding)[0])
@@ -72,22 +84,27 @@ def predici_peso_sentiment(titolo: str, riassunto_lungo: str):
 
 
 # === 4. Processo batch su DB: solo articoli con categoria IS NOT NULL e senza peso/sentiment ===
-def genera_peso_sentiment_per_articoli():
+def genera_peso_sentiment_per_articoli(dimensione_flush=database.DIMENSIONE_FLUSH):
     rows = database.get_articoli_senza_peso_sentiment_con_categoria()
     if not rows:
         print("✅ Nessun articolo da aggiornare (peso/sentiment).")
         return
 
+    # Carica i modelli fuori dal try del ciclo: un errore di caricamento non va contato come errore di predizione
+    carica_modelli()
+
     aggiornati = 0
     errori = 0
 
-    for (art_id, titolo, riassunto) in rows:
-        try:
-            peso, sentiment = predici_peso_sentiment(titolo, riassunto)
-            database.aggiorna_peso_sentiment_articolo(art_id, peso, sentiment)
-            aggiornati += 1
-        except Exception as e:
-            # non stampiamo stacktrace verbosi: registriamo solo il conteggio
-            errori += 1
+    # Le predizioni vengono scritte nel DB a blocchi di `dimensione_flush` articoli
+    with database.BufferScrittura(database.aggiorna_peso_sentiment_bulk, dimensione_flush) as buffer_ps:
+        for (art_id, titolo, riassunto) in rows:
+            try:
+                peso, sentiment = predici_peso_sentiment(titolo, riassunto)
+                buffer_ps.aggiungi(art_id, peso, sentiment)
+                aggiornati += 1
+            except Exception as e:
+                # non stampiamo stacktrace verbosi: registriamo solo il conteggio
+                errori += 1
 
     print(f"📈 Aggiornamento completato | aggiornati: {aggiornati} | errori: {errori}")
@@ -21,6 +21,8 @@ from reportlab.lib.units import cm
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
 
+import database
+
 DB_PATH = "crypto_news.db"
 OUT_DIR = "reports"  # cartella di output
 
@@ -51,13 +53,17 @@ def fetch_news(start_date_sql: str, end_date_sql: str) -> List[Dict]:
     Query parametrizzata sull'intervallo date di meta_articoli.data.
     Filtri sui contenuti testuali in articoli.* (non NULL e non 'NESSUN CONTENUTO').
     """
-    query = """
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    if Path(database.ARCHIVIO_PATH).exists():  # contenuti degli articoli vecchi (vedi archiviazioneArticoli.py)
+        conn.execute("ATTACH DATABASE ? AS archivio", (database.ARCHIVIO_PATH,))
+
+    query = f"""
         SELECT
             a.id,
             a.titolo,
-            a.articolo_completo_html,
-            a.riassunto_breve,
-            a.riassunto_lungo,
+            {database.colonna_con_archivio("riassunto_breve", "a", conn)} AS riassunto_breve,
+            {database.colonna_con_archivio("riassunto_lungo", "a", conn)} AS riassunto_lungo,
             a.categoria AS categoria_articolo,
             a.peso,
             a.sentiment,
@@ -67,13 +73,11 @@ def fetch_news(start_date_sql: str, end_date_sql: str) -> List[Dict]:
             ma.categoria   AS categoria_meta
         FROM articoli AS a
         JOIN meta_articoli AS ma ON a.id = ma.id
-        WHERE DATE(ma.data) BETWEEN ? AND ?
+        WHERE ma.data >= ? AND ma.data < DATE(?, '+1 day')  -- range sulla colonna: usa idx_meta_articoli_data
           AND a.articolo_completo_html IS NOT NULL AND a.articolo_completo_html != 'NESSUN CONTENUTO'
           AND a.riassunto_breve        IS NOT NULL AND a.riassunto_breve        != 'NESSUN CONTENUTO'
           AND a.riassunto_lungo        IS NOT NULL AND a.riassunto_lungo        != 'NESSUN CONTENUTO'
     """
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
     try:
         cur = conn.execute(query, (start_date_sql, end_date_sql))
         rows = cur.fetchall()
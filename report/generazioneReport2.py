@@ -23,6 +23,8 @@ from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
 from reportlab.lib import colors
 from reportlab.graphics.shapes import Drawing, Wedge, Line, Circle, String
 
+import database
+
 DB_PATH = "crypto_news.db"
 OUT_DIR = "reports"  # cartella di output
 
@@ -46,13 +48,17 @@ def get_date_range_last_week(tz: str = "Europe/Rome") -> tuple[str, str, str, st
 
 # ---------------------- DB ----------------------
 def fetch_news(start_date_sql: str, end_date_sql: str) -> List[Dict]:
-    query = """
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    if Path(database.ARCHIVIO_PATH).exists():  # contenuti degli articoli vecchi (vedi archiviazioneArticoli.py)
+        conn.execute("ATTACH DATABASE ? AS archivio", (database.ARCHIVIO_PATH,))
+
+    query = f"""
         SELECT
             a.id,
             a.titolo,
-            a.articolo_completo_html,
-            a.riassunto_breve,
-            a.riassunto_lungo,
+            {database.colonna_con_archivio("riassunto_breve", "a", conn)} AS riassunto_breve,
+            {database.colonna_con_archivio("riassunto_lungo", "a", conn)} AS riassunto_lungo,
             a.categoria AS categoria_articolo,
             a.peso,
             a.sentiment,
@@ -62,13 +68,11 @@ def fetch_news(start_date_sql: str, end_date_sql: str) -> List[Dict]:
             ma.categoria   AS categoria_meta
         FROM articoli AS a
         JOIN meta_articoli AS ma ON a.id = ma.id
-        WHERE DATE(ma.data) BETWEEN ? AND ?
+        WHERE ma.data >= ? AND ma.data < DATE(?, '+1 day')  -- range sulla colonna: usa idx_meta_articoli_data
           AND a.articolo_completo_html IS NOT NULL AND a.articolo_completo_html != 'NESSUN CONTENUTO'
           AND a.riassunto_breve        IS NOT NULL AND a.riassunto_breve        != 'NESSUN CONTENUTO'
           AND a.riassunto_lungo        IS NOT NULL AND a.riassunto_lungo        != 'NESSUN CONTENUTO'
     """
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
     try:
         cur = conn.execute(query, (start_date_sql, end_date_sql))
         rows = cur.fetchall()
@@ -76,6 +80,28 @@ def fetch_news(start_date_sql: str, end_date_sql: str) -> List[Dict]:
     finally:
         conn.close()
 
+def fetch_daily_stats(start_date_sql: str, end_date_sql: str) -> Dict | None:
+    """
+    Somma degli aggregati giornalieri (tabella daily_stats) nell'intervallo: O(giorni) invece
+    di O(articoli). Ritorna None se il DB non ha ancora la tabella (schema non migrato).
+    """
+    query = """
+        SELECT COALESCE(SUM(n), 0)                    AS n,
+               COALESCE(SUM(somma_peso), 0)           AS somma_peso,
+               COALESCE(SUM(somma_peso_sentiment), 0) AS somma_peso_sentiment,
+               COALESCE(SUM(somma_sentiment), 0)      AS somma_sentiment
+        FROM daily_stats
+        WHERE giorno BETWEEN ? AND ?
+    """
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    try:
+        return dict(conn.execute(query, (start_date_sql, end_date_sql)).fetchone())
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+
 # ---------------------- Util ----------------------
 def _fmt_date(date_value) -> str:
     try:
@@ -109,11 +135,19 @@ def compute_fng_index(news: List[Dict]) -> tuple[int, str]:
             continue
         values.append(s); weights.append(w)
 
-    if not values:
+    return _fng_da_somme(len(values), sum(weights), sum(v*w for v, w in zip(values, weights)), sum(values))
+
+def compute_fng_index_da_stats(stats: Dict) -> tuple[int, str]:
+    """
+    Come compute_fng_index, ma a partire dalle somme di daily_stats (vedi fetch_daily_stats).
+    """
+    return _fng_da_somme(stats["n"], stats["somma_peso"], stats["somma_peso_sentiment"], stats["somma_sentiment"])
+
+def _fng_da_somme(n: int, wsum: float, wvsum: float, vsum: float) -> tuple[int, str]:
+    if not n:
         return 50, "Neutral"
 
-    wsum = sum(weights)
-    avg = (sum(values) / len(values)) if wsum <= 0 else sum(v*w for v, w in zip(values, weights)) / wsum
+    avg = (vsum / n) if wsum <= 0 else wvsum / wsum
     score = int(round(max(0.0, min(1.0, avg)) * 100))
 
     if score <= 24:
@@ -169,7 +203,8 @@ def draw_fng_gauge(score: int, label: str, width: int = 420, height: int = 260)
     return d
 
 # ---------------------- PDF ----------------------
-def build_pdf(news: List[Dict], start_title: str, end_title: str, out_dir: str = OUT_DIR) -> Path:
+def build_pdf(news: List[Dict], start_title: str, end_title: str, out_dir: str = OUT_DIR,
+              fng: tuple[int, str] | None = None) -> Path:
     Path(out_dir).mkdir(parents=True, exist_ok=True)
     filename = f"report_mercato_cryptovalute_{start_title.replace('/','-')}_{end_title.replace('/','-')}.pdf"
     out_path = Path(out_dir) / filename
@@ -251,7 +286,7 @@ def build_pdf(news: List[Dict], start_title: str, end_title: str, out_dir: str =
                 ))
 
     # ===== Fear & Greed Index =====
-    score, label = compute_fng_index(news or [])
+    score, label = fng if fng is not None else compute_fng_index(news or [])
     story.append(Spacer(1, 16))
     story.append(Paragraph("Fear & Greed Index (news-weighted)", styles["SectionHeader"]))
     story.append(Paragraph(
@@ -273,7 +308,9 @@ def build_pdf(news: List[Dict], start_title: str, end_title: str, out_dir: str =
 def main():
     start_date_sql, end_date_sql, start_title, end_title = get_date_range_last_week("Europe/Rome")
     news = fetch_news(start_date_sql, end_date_sql)
-    pdf_path = build_pdf(news, start_title, end_title)
+    stats = fetch_daily_stats(start_date_sql, end_date_sql)
+    fng = compute_fng_index_da_stats(stats) if stats is not None else None
+    pdf_path = build_pdf(news, start_title, end_title, fng=fng)
     print(f"PDF creato: {pdf_path}")
 
 if __name__ == "__main__":
@@ -58,45 +58,52 @@ def chiama_api_riassunti(article_text, api_url):
     response.raise_for_status()
     return response.json()
 
-def riassunto_articoli():
+def riassunto_articoli(dimensione_flush=database.DIMENSIONE_FLUSH, da_id=0):
     api_url = _get_api_url()  # lazy + validazione effettiva dell'endpoint
 
-    articles = database.ottieni_articoli_da_riassumere()
-    if not articles:
+    # Gli articoli vengono letti a pagine (i contenuti non stanno tutti in memoria);
+    # con da_id si riprende un'esecuzione interrotta dopo l'ultimo id elaborato.
+    articles = database.itera_articoli_da_riassumere(da_id=da_id)
+    elaborati = 0
+
+    # I riassunti vengono scritti nel DB a blocchi di `dimensione_flush` articoli
+    with database.BufferScrittura(database.salva_riassunti_bulk, dimensione_flush) as buffer_riassunti:
+        for id_articolo, full_article_html in articles:
+            elaborati += 1
+            print(f"\n📝 Riassunto per articolo ID {id_articolo}...")
+
+            success = False
+            for attempt in range(3):
+                try:
+                    print(f"🔁 Tentativo {attempt+1}/3...")
+                    result = chiama_api_riassunti(full_article_html, api_url)
+
+                    if isinstance(result, list) and len(result) == 2:
+                        short_summary = pulisci_testo_incompleto(result[0])
+                        long_summary  = pulisci_testo_incompleto(result[1])
+
+                        if short_summary.startswith("L'articolo non contiene contenuti rilevanti.") or \
+                           long_summary.startswith("L'articolo non contiene contenuti rilevanti."):
+                            short_summary = long_summary = "NESSUN CONTENUTO"
+
+                        buffer_riassunti.aggiungi(id_articolo, short_summary, long_summary)
+                        print(f"✅ Riassunti pronti per il salvataggio, articolo ID {id_articolo}")
+                        success = True
+                        break
+                    else:
+                        print(f"⚠️ Formato risposta non valido per ID {id_articolo}: {result}")
+
+                except requests.exceptions.RequestException as e:
+                    print(f"❌ Errore API per ID {id_articolo}: {str(e)}")
+                except Exception as e:
+                    print(f"❌ Errore interno per ID {id_articolo}: {str(e)}")
+
+            if not success:
+                print(f"⛔ Fallimento persistente per articolo ID {id_articolo}, salvo 'NESSUN CONTENUTO'")
+                buffer_riassunti.aggiungi(id_articolo, "NESSUN CONTENUTO", "NESSUN CONTENUTO")
+
+    if not elaborati:
         print("✅ Nessun articolo da riassumere.")
         return
 
-    for id_articolo, full_article_html in articles:
-        print(f"\n📝 Riassunto per articolo ID {id_articolo}...")
-
-        success = False
-        for attempt in range(3):
-            try:
-                print(f"🔁 Tentativo {attempt+1}/3...")
-                result = chiama_api_riassunti(full_article_html, api_url)
-
-                if isinstance(result, list) and len(result) == 2:
-                    short_summary = pulisci_testo_incompleto(result[0])
-                    long_summary  = pulisci_testo_incompleto(result[1])
-
-                    if short_summary.startswith("L'articolo non contiene contenuti rilevanti.") or \
-                       long_summary.startswith("L'articolo non contiene contenuti rilevanti."):
-                        short_summary = long_summary = "NESSUN CONTENUTO"
-
-                    database.salva_riassunto_articolo(id_articolo, short_summary, long_summary)
-                    print(f"✅ Riassunti salvati per articolo ID {id_articolo}")
-                    success = True
-                    break
-                else:
-                    print(f"⚠️ Formato risposta non valido per ID {id_articolo}: {result}")
-
-            except requests.exceptions.RequestException as e:
-                print(f"❌ Errore API per ID {id_articolo}: {str(e)}")
-            except Exception as e:
-                print(f"❌ Errore interno per ID {id_articolo}: {str(e)}")
-
-        if not success:
-            print(f"⛔ Fallimento persistente per articolo ID {id_articolo}, salvo 'NESSUN CONTENUTO'")
-            database.salva_riassunto_articolo(id_articolo, "NESSUN CONTENUTO", "NESSUN CONTENUTO")
-
     print("\n🏁 Riassunto completato per tutti gli articoli.")
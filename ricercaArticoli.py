@@ -0,0 +1,47 @@
+"""
+Ricerca full-text nell'archivio degli articoli (titolo, riassunto breve e lungo).
+
+Uso (dalla root del progetto):
+    python ricercaArticoli.py "ETF AND SEC" --giorni 90
+    python ricercaArticoli.py "hack*" --dal 2025-06-01 --al 2025-08-31 --categoria "Sicurezza, Hackeraggi e Truffe"
+    python ricercaArticoli.py --ricostruisci      # ricostruisce l'indice dei DB esistenti
+"""
+
+import argparse
+from datetime import date, timedelta
+
+import database
+
+
+def stampa_risultati(risultati):
+    if not risultati:
+        print("Nessun articolo trovato.")
+        return
+    for r in risultati:
+        print(f"[{r['data']}] #{r['id']} ({r['categoria'] or 'senza categoria'}) {r['titolo']}")
+        if r["riassunto_breve"]:
+            print(f"    {r['riassunto_breve']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ricerca full-text negli articoli")
+    parser.add_argument("query", nargs="?", help="query FTS5, es. 'ETF AND SEC'")
+    parser.add_argument("--giorni", type=int, help="solo gli ultimi N giorni")
+    parser.add_argument("--dal", help="data iniziale YYYY-MM-DD")
+    parser.add_argument("--al", help="data finale YYYY-MM-DD (inclusa)")
+    parser.add_argument("--categoria")
+    parser.add_argument("--limite", type=int, default=50)
+    parser.add_argument("--ricostruisci", action="store_true", help="ricostruisce l'indice full-text")
+    args = parser.parse_args()
+
+    database.migra_database()
+
+    if args.ricostruisci:
+        database.ricostruisci_indice_fts()
+    if args.query:
+        start = args.dal
+        if args.giorni is not None:
+            start = (date.today() - timedelta(days=args.giorni)).isoformat()
+        stampa_risultati(database.cerca_articoli(args.query, start, args.al, args.categoria, args.limite))
+    elif not args.ricostruisci:
+        parser.error("specificare una query oppure --ricostruisci")
@@ -0,0 +1,220 @@
+"""
+Scaricamento delle pagine degli articoli via HTTP semplice, senza avviare Chrome.
+
+La maggior parte dei siti di notizie restituisce l'HTML dell'articolo senza bisogno di
+JavaScript: si prova prima con una richiesta HTTP (sessione con keep-alive, gzip/brotli,
+stessi header it-IT di Tesi/recuperoHtml.py) e si passa a Selenium solo se la risposta è
+una verifica anti-bot o se dalla pagina non si ricava alcun contenuto.
+Per ogni dominio si ricorda quale metodo funziona (tabella metodi_domini).
+"""
+
+import html as html_lib
+import re
+import threading
+from collections import Counter
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING  # include "br" solo se brotli è installato
+
+import database
+from limitatoreDomini import limitatore
+
+HEADERS_HTTP = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/126.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "it-IT,it;q=0.9,en-US;q=0.8,en;q=0.7",
+    "Accept-Encoding": ACCEPT_ENCODING,
+}
+TIMEOUT_HTTP = 15  # secondi
+DIMENSIONE_POOL = 20  # connessioni tenute aperte per host
+
+# Testi tipici delle pagine di verifica anti-bot (Cloudflare, DataDome, PerimeterX, ...)
+MARCATORI_VERIFICA = (
+    "cf-chl", "challenge-platform", "just a moment...", "attention required! | cloudflare",
+    "enable javascript and cookies to continue", "ddos-guard", "captcha-delivery",
+    "px-captcha", "verifying you are human", "verify you are human",
+)
+
+# Redirect scritti nella pagina invece che negli header (meta refresh o assegnazione JavaScript)
+_REDIRECT_IN_PAGINA = re.compile(
+    r"""(?:http-equiv=["']?refresh["']?[^>]*?url=\s*["']?|(?:window\.)?location(?:\.href)?\s*=\s*["']|location\.replace\(\s*["'])"""
+    r"""(https?://[^"'\s>]+|/[^"'\s>]+)""",
+    re.IGNORECASE,
+)
+
+# Charset dichiarato nella pagina (<meta charset=...> o <meta http-equiv="Content-Type" content="...; charset=...">)
+_CHARSET_IN_PAGINA = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.IGNORECASE)
+
+_locale = threading.local()
+
+
+def get_sessione():
+    """Sessione HTTP del thread corrente (requests.Session non va condivisa tra thread)."""
+    sessione = getattr(_locale, "sessione", None)
+    if sessione is None:
+        sessione = requests.Session()
+        sessione.headers.update(HEADERS_HTTP)
+        adattatore = HTTPAdapter(pool_connections=DIMENSIONE_POOL, pool_maxsize=DIMENSIONE_POOL)
+        sessione.mount("http://", adattatore)
+        sessione.mount("https://", adattatore)
+        _locale.sessione = sessione
+    return sessione
+
+
+def dominio(url):
+    """Dominio dell'URL senza 'www.' (chiave della memoria per dominio)."""
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def e_pagina_di_verifica(status_code, html):
+    if status_code in (403, 429, 503):
+        return True
+    inizio = html[:20000].lower()
+    return any(marcatore in inizio for marcatore in MARCATORI_VERIFICA)
+
+
+def scarica_html(url):
+    """
+    Scarica la pagina via HTTP. Ritorna l'HTML, oppure None se la richiesta fallisce,
+    la risposta non è una pagina HTML o è una verifica anti-bot (serve il browser).
+    """
+    limitatore.attendi_turno(dominio(url))
+    try:
+        risposta = get_sessione().get(url, timeout=TIMEOUT_HTTP)
+    except requests.exceptions.RequestException:
+        return None
+
+    tipo = risposta.headers.get("Content-Type", "html")
+    if "html" not in tipo:
+        return None
+    if "charset" not in tipo.lower():
+        # Senza charset nell'header requests decodificherebbe come ISO-8859-1: vale quello della pagina
+        dichiarato = _CHARSET_IN_PAGINA.search(risposta.content[:4096])
+        risposta.encoding = dichiarato.group(1).decode("ascii") if dichiarato else risposta.apparent_encoding
+    html = risposta.text
+    if e_pagina_di_verifica(risposta.status_code, html) or risposta.status_code >= 400:
+        return None
+    return html
+
+
+def risolvi_redirect(url, max_salti=3):
+    """
+    URL di destinazione di `url` seguendo i redirect HTTP e quelli scritti nella pagina
+    (meta refresh / JavaScript), senza renderizzare nulla. I salti si seguono uno alla volta
+    e ci si ferma al primo che porta fuori dal dominio di partenza: la pagina di destinazione
+    non viene mai richiesta. Ritorna None se una richiesta fallisce o finisce su una verifica anti-bot.
+    """
+    sessione = get_sessione()
+    partenza = dominio(url)
+    for _ in range(max_salti):
+        limitatore.attendi_turno(partenza)
+        try:
+            with sessione.get(url, timeout=TIMEOUT_HTTP, stream=True, allow_redirects=False) as risposta:
+                if risposta.is_redirect:
+                    url = urljoin(url, risposta.headers["Location"])
+                    if dominio(url) != partenza:
+                        return url
+                    continue
+                if risposta.status_code >= 400:
+                    return None
+
+                # Stesso dominio di partenza: il redirect potrebbe essere nella pagina
+                inizio = next(risposta.iter_content(65536), b"").decode(risposta.encoding or "utf-8", errors="replace")
+        except requests.exceptions.RequestException:
+            return None
+
+        if e_pagina_di_verifica(risposta.status_code, inizio):
+            return None
+        trovato = _REDIRECT_IN_PAGINA.search(inizio)
+        if not trovato:
+            return url
+        url = urljoin(url, html_lib.unescape(trovato.group(1)))
+        if dominio(url) != partenza:
+            return url
+    return url
+
+
+class MemoriaDomini:
+    """
+    Ricorda per ogni dominio quante volte l'HTTP semplice ha funzionato (http_ok) e quante
+    volte è servito Chrome (http_ko). Condivisa tra i thread; si salva con salva().
+    """
+
+    SOGLIA_KO = 2         # fallimenti dopo cui il dominio passa direttamente a Chrome...
+    RIPROVA_OGNI = 20     # ...riprovando comunque l'HTTP una volta ogni N articoli
+
+    def __init__(self):
+        self._esiti = {d: list(esiti) for d, esiti in database.get_metodi_domini().items()}
+        self._modificati = set()
+        self._saltati = Counter()
+        self.usati = Counter()  # metodo con cui è stato ottenuto il contenuto in questa esecuzione
+        self._lock = threading.Lock()
+
+    def usa_http(self, nome_dominio):
+        with self._lock:
+            ok, ko = self._esiti.get(nome_dominio, (0, 0))
+            if ko < self.SOGLIA_KO or ko <= ok:
+                return True
+            self._saltati[nome_dominio] += 1
+            return self._saltati[nome_dominio] % self.RIPROVA_OGNI == 0
+
+    def registra(self, nome_dominio, http_ok):
+        with self._lock:
+            esiti = self._esiti.setdefault(nome_dominio, [0, 0])
+            esiti[0 if http_ok else 1] += 1
+            self._modificati.add(nome_dominio)
+
+    def conta(self, metodo):
+        with self._lock:
+            self.usati[metodo] += 1
+
+    def registra_contenuto(self, nome_dominio, metodo, provato_http):
+        """Registra un contenuto valido ottenuto con `metodo` ("http" o "selenium")."""
+        self.conta(metodo)
+        if metodo == "http":
+            self.registra(nome_dominio, True)
+        # Conta come fallimento solo se Chrome ha trovato un contenuto che l'HTTP non ha visto
+        elif provato_http:
+            self.registra(nome_dominio, False)
+
+    def salva(self):
+        with self._lock:
+            righe = [(d, *self._esiti[d]) for d in self._modificati]
+            self._modificati.clear()
+        database.salva_metodi_domini_bulk(righe)
+
+    def stampa_riepilogo(self):
+        if self.usati:
+            print(f"🌐 Contenuti ottenuti: {self.usati['http']} via HTTP, {self.usati['selenium']} con Chrome.")
+
+
+def contenuto_articolo(url, memoria, pulisci, html_con_selenium):
+    """
+    Contenuto pulito dell'articolo: prova via HTTP (se il dominio lo consente) e ricorre a
+    `html_con_selenium()` (HTML della pagina caricata da Chrome, o None) solo se l'HTTP non
+    dà un contenuto valido. `pulisci` è la funzione di pulizia dell'HTML (cleanHtml.clean_html_content).
+    Ritorna (contenuto pulito, HTML grezzo da cui è stato ricavato), l'HTML serve per l'archivio.
+    """
+    nome_dominio = dominio(url)
+    provato_http = memoria.usa_http(nome_dominio)
+    html = None
+
+    if provato_http:
+        html = scarica_html(url)
+        contenuto = pulisci(html) if html else ""
+        if contenuto.strip():
+            memoria.registra_contenuto(nome_dominio, "http", True)
+            return contenuto, html
+
+    html_selenium = html_con_selenium()
+    contenuto = pulisci(html_selenium) if html_selenium else ""
+    if contenuto.strip():
+        memoria.registra_contenuto(nome_dominio, "selenium", provato_http)
+    return contenuto, html_selenium or html